@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+# ============================================================
+# Ensure repository root is on PYTHONPATH
+# ============================================================
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.fmri.pca_embedding import compute_embeddings
+from src.fmri.decomposition import DECOMPOSERS
+from src.io.nifti_loader import load_fmri_from_nifti
+
+# ============================================================
+# Arguments
+# ============================================================
+parser = argparse.ArgumentParser(
+    description="Wall time / peak memory of the fMRI decomposition backends"
+)
+parser.add_argument("--nifti", default=None, help="Real run to benchmark (optional)")
+parser.add_argument("--trs", type=int, default=245)
+parser.add_argument("--voxels", type=int, default=200_000)
+parser.add_argument("--rank", type=int, default=64, help="Latent rank of synthetic data")
+parser.add_argument("--n-components", type=int, default=512)
+parser.add_argument("--batch-size", type=int, default=200)
+parser.add_argument("--methods", nargs="+", default=list(DECOMPOSERS))
+args = parser.parse_args()
+
+# ============================================================
+# Data
+# ============================================================
+if args.nifti:
+    voxels, _ = load_fmri_from_nifti(args.nifti)
+else:
+    rng = np.random.default_rng(0)
+    latent = rng.standard_normal((args.trs, args.rank)).astype(np.float32)
+    loading = rng.standard_normal((args.rank, args.voxels)).astype(np.float32)
+    voxels = latent @ loading
+    voxels += 0.5 * rng.standard_normal(voxels.shape, dtype=np.float32)
+    voxels = (voxels - voxels.mean(0)) / (voxels.std(0) + 1e-6)
+
+print(f"Data: TR={voxels.shape[0]} | voxels={voxels.shape[1]}\n")
+
+# ============================================================
+# Benchmark
+# ============================================================
+reference = None
+print(f"{'method':<12}{'time [s]':>10}{'peak [MB]':>12}{'EV':>8}{'corr vs ipca (mean/min)':>26}")
+
+for method in args.methods:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    Z, ev = compute_embeddings(voxels, args.n_components, args.batch_size, method)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    Z = Z.numpy()
+    if method == "ipca":
+        reference = Z
+
+    agreement = ""
+    if reference is not None:
+        # signed correlation of the leading 10 score columns: backends share
+        # ipca's sign convention, so a flipped component shows up as < 0
+        k = min(10, Z.shape[1], reference.shape[1])
+        c = [np.corrcoef(Z[:, i], reference[:, i])[0, 1] for i in range(k)]
+        agreement = f"{np.mean(c):.4f} / {np.min(c):.4f}"
+
+    print(f"{method:<12}{elapsed:>10.2f}{peak / 2**20:>12.1f}{ev:>8.3f}{agreement:>26}")
@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import torch
+
+# ============================================================
+# Ensure repository root is on PYTHONPATH
+# ============================================================
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.audio.pooling import pool_windows
+from src.fusion.align import align_w2v2_to_TR
+from src.utils.temporal import interval_means
+
+
+# ============================================================
+# Reference (loop) implementations the kernels replaced
+# ============================================================
+def pool_windows_loop(H, frame_hz, win_sec, hop_sec):
+    if H.numel() == 0:
+        return H
+
+    win = int(win_sec * frame_hz)
+    hop = int(hop_sec * frame_hz)
+
+    pooled = []
+    for s in range(0, H.size(0), hop):
+        seg = H[s:s+win]
+        if seg.numel() == 0:
+            break
+        pooled.append(seg.mean(dim=0, keepdim=True))
+        if s + win >= H.size(0):
+            break
+
+    return torch.cat(pooled, dim=0)
+
+
+def align_loop(meta, W, win_sec, hop_sec, TR=2.0):
+    T = int(meta["n_tr"])
+    N, D = W.shape
+    out = torch.zeros(T, D)
+
+    r = TR / hop_sec
+    r_int = int(round(r))
+
+    if abs(r - r_int) < 1e-6 and r_int >= 1:
+        for t in range(T):
+            s, e = t * r_int, (t + 1) * r_int
+            if s >= N: break
+            out[t] = W[s:min(e, N)].mean(dim=0)
+        return out
+
+    centers = (torch.arange(N) * hop_sec + win_sec / 2).numpy()
+    tr_centers = (np.arange(T) * TR + TR / 2)
+    idx = np.clip(np.searchsorted(centers, tr_centers), 0, N - 1)
+    return W[idx]
+
+
+def bench(fn, *args, repeat=5):
+    fn(*args)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn(*args)
+    return out, (time.perf_counter() - t0) / repeat
+
+
+# ============================================================
+# Arguments
+# ============================================================
+parser = argparse.ArgumentParser(
+    description="Equivalence checks and micro-benchmark of the temporal kernels"
+)
+parser.add_argument("--seconds", type=float, default=600.0, help="Audio length")
+parser.add_argument("--dims", type=int, default=768)
+parser.add_argument("--frame-hz", type=float, default=50.0)
+args = parser.parse_args()
+
+torch.manual_seed(0)
+H = torch.randn(int(args.seconds * args.frame_hz), args.dims)
+
+# ============================================================
+# Window pooling
+# ============================================================
+print(f"{'kernel':<40}{'loop [ms]':>12}{'vector [ms]':>14}{'max |diff|':>14}")
+
+for win_sec, hop_sec in [(2.0, 2.0), (2.0, 1.0), (2.0, 0.5), (1.5, 2.0)]:
+    ref, t_ref = bench(pool_windows_loop, H, args.frame_hz, win_sec, hop_sec)
+    out, t_vec = bench(pool_windows, H, args.frame_hz, win_sec, hop_sec)
+    assert ref.shape == out.shape
+    diff = float((ref - out).abs().max())
+    assert torch.allclose(ref, out, atol=1e-5), diff
+    print(f"{f'pool_windows win={win_sec} hop={hop_sec}':<40}"
+          f"{t_ref * 1e3:>12.2f}{t_vec * 1e3:>14.2f}{diff:>14.2e}")
+
+# ============================================================
+# TR alignment
+# ============================================================
+for hop_sec, TR, extra_trs in [(0.5, 2.0, 0), (1.0, 2.0, 7), (0.75, 2.0, 0)]:
+    W = pool_windows(H, args.frame_hz, hop_sec, hop_sec)
+    meta = {"n_tr": int(W.shape[0] * hop_sec / TR) + extra_trs}
+
+    ref, t_ref = bench(align_loop, meta, W, hop_sec, hop_sec, TR)
+    out, t_vec = bench(align_w2v2_to_TR, meta, W, hop_sec, hop_sec, TR)
+    diff = float((ref - out).abs().max())
+    assert torch.allclose(ref, out, atol=1e-5), diff
+    print(f"{f'align_w2v2_to_TR hop={hop_sec} TR={TR}':<40}"
+          f"{t_ref * 1e3:>12.2f}{t_vec * 1e3:>14.2f}{diff:>14.2e}")
+
+# Arbitrary (ragged, overlapping, empty) intervals take the sparse path
+starts = torch.randint(0, H.shape[0], (500,))
+ends = torch.clamp(starts + torch.randint(0, 300, (500,)), max=H.shape[0])
+ref = torch.stack([
+    H[s:e].mean(dim=0) if e > s else torch.zeros(H.shape[1])
+    for s, e in zip(starts.tolist(), ends.tolist())
+])
+assert torch.allclose(interval_means(H, starts, ends), ref, atol=1e-5)
+
+# Overlap-weighted mode agrees with whole-window means for integer ratios
+W = pool_windows(H, args.frame_hz, 1.0, 1.0)
+meta = {"n_tr": W.shape[0] // 2}
+out = align_w2v2_to_TR(meta, W, 1.0, 1.0, 2.0, mode="overlap")
+assert torch.allclose(out, align_loop(meta, W, 1.0, 1.0, 2.0), atol=1e-5)
+
+print("\n✅ Vectorized kernels match the loop implementations.")
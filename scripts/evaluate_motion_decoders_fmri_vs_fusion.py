@@ -12,6 +12,7 @@ if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
 from src.motion.model import MotionDecoder
+from src.motion.descriptors import motion_dim
 from src.motion.evaluation_motion import evaluate_motion_decoders
 
 # ============================================================
@@ -37,16 +38,18 @@ device = "cuda" if torch.cuda.is_available() else "cpu"
 # ============================================================
 # Load models
 # ============================================================
+d_motion = motion_dim(cfg["paths"]["motion_root"])
+
 fmri_model = MotionDecoder(
     d_model=cfg["dims"]["fmri"],
-    d_motion=2,
+    d_motion=d_motion,
     n_layers=2,
     n_heads=cfg["model"]["fmri"]["n_heads"]
 ).to(device)
 
 fusion_model = MotionDecoder(
     d_model=cfg["dims"]["fusion"],
-    d_motion=2,
+    d_motion=d_motion,
     n_layers=2,
     n_heads=cfg["model"]["fusion"]["n_heads"]
 ).to(device)
@@ -84,7 +87,8 @@ df = evaluate_motion_decoders(
     cfg["fps"],
     cfg["dims"]["fmri"],
     cfg["dims"]["fusion"],
-    device
+    device,
+    subjects=cfg.get("subjects")
 )
 
 # ============================================================
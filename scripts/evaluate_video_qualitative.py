@@ -1,9 +1,7 @@
 import os
 import sys
 import yaml
-import imageio
 import pandas as pd
-from PIL import Image
 from tqdm import tqdm
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -43,17 +41,8 @@ for subj in cfg["subjects"]:
         if not all(os.path.exists(p) for p in [gt_path, fmri_path, fusion_path]):
             continue
 
-        reader = imageio.get_reader(gt_path, "ffmpeg")
-        gt_frames = []
-        for i, frame in enumerate(reader):
-            if i < gt_frames_count:
-                gt_frames.append(Image.fromarray(frame))
-            else:
-                break
-        reader.close()
-
         n = cfg["video"]["num_samples"]
-        gt_samples = [gt_frames[int(i*(len(gt_frames)-1)/(n-1))] for i in range(n)]
+        gt_samples = sample_frames(gt_path, n, max_frames=gt_frames_count)
         fmri_samples = sample_frames(fmri_path, n)
         fusion_samples = sample_frames(fusion_path, n)
 
@@ -1,6 +1,5 @@
 import os, sys, yaml, torch
 import pandas as pd
-from torchvision import transforms
 from lpips import LPIPS
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -14,11 +13,6 @@ with open(os.path.join(ROOT, "configs", "eval_video_quantitave.yaml")) as f:
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
-transform = transforms.Compose([
-    transforms.Resize(cfg["video"]["resize"]),
-    transforms.ToTensor()
-])
-
 lpips_fn = LPIPS(net="vgg").to(device)
 
 csv_path = cfg["paths"]["output_csv"]
@@ -26,9 +20,15 @@ if os.path.exists(csv_path):
     print(f"⏩ Skipping evaluation — CSV exists: {csv_path}")
     df = pd.read_csv(csv_path)
 else:
-    df = evaluate(cfg, transform, lpips_fn, device)
+    df, frames_df = evaluate(cfg, lpips_fn, device)
     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
     df.to_csv(csv_path, index=False)
     print(f"✅ Saved metrics to {csv_path}")
 
+    frame_csv = cfg["paths"].get("per_frame_csv")
+    if frame_csv:
+        os.makedirs(os.path.dirname(frame_csv), exist_ok=True)
+        frames_df.to_csv(frame_csv, index=False)
+        print(f"✅ Saved per-frame metrics to {frame_csv}")
+
 plot_all(df, cfg["paths"]["summary_dir"])
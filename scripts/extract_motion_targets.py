@@ -5,24 +5,108 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
+import json
+import yaml
 import torch
-from tqdm import tqdm
-from src.motion.optical_flow import compute_optical_flow
-
-VIDEO_DIR = "/content/drive/MyDrive/Research/data/stimuli/videos"
-OUT_DIR = "/content/drive/MyDrive/Research/data/generated/motion_targets"
-os.makedirs(OUT_DIR, exist_ok=True)
-
-video_ids = [f"seg{i}" for i in range(1,19)] + [f"test{i}" for i in range(1,6)]
-
-for vid in tqdm(video_ids):
-    out = os.path.join(OUT_DIR, f"{vid}_motion.pt")
-    if os.path.exists(out):
-        print(f"⏩ Skipping {vid} (already exists)")
-        continue
-    path = os.path.join(VIDEO_DIR, f"{vid}.mp4")
-    if not os.path.exists(path):
-        continue
-    flow = compute_optical_flow(path)
-    if flow is not None:
-        torch.save(flow, out)
+from src.motion.target_extraction import extract_motion_targets
+from src.motion.descriptors import build_schema, meta_path
+from src.motion.target_cache import MotionTargetCache, target_key
+from src.utils.disk_cache import file_sha256
+from src.io.packed_store import PackedStoreWriter
+from src.io.manifest import record_output, sync_manifest
+
+
+def main():
+    with open(os.path.join(ROOT_DIR, "configs", "motion_targets.yaml")) as f:
+        cfg = yaml.safe_load(f)
+
+    VIDEO_DIR = cfg["paths"]["video_dir"]
+    OUT_DIR = cfg["paths"]["out_dir"]
+    os.makedirs(OUT_DIR, exist_ok=True)
+    schema = build_schema(cfg["descriptors"])
+
+    store = PackedStoreWriter(cfg["store"]["dir"], meta={"modality": "motion"}) \
+        if cfg["store"]["enabled"] else None
+
+    if store is None and cfg["manifest"]["enabled"]:
+        # record targets written before the manifest was enabled
+        sync_manifest(OUT_DIR, "motion")
+
+    cache = MotionTargetCache(cfg["cache"]["dir"], cfg["cache"]["max_size_gb"]) \
+        if cfg["cache"]["enabled"] else None
+    resize = cfg["flow"]["resize"]
+
+    def target_key_of(path):
+        if cache is not None:
+            return cache.key(path, resize, schema)
+        return target_key(file_sha256(path), resize, schema)
+
+    def written_key(vid):
+        # cache key recorded with the existing output, if any
+        if store is not None:
+            return store.entry_meta(vid).get("cache_key") if vid in store else None
+        out_meta = meta_path(os.path.join(OUT_DIR, f"{vid}_motion.pt"))
+        if not os.path.exists(out_meta):
+            return None
+        with open(out_meta) as f:
+            return json.load(f).get("cache_key")
+
+    def write(vid, path, flow, key):
+        meta = {
+            "video": path,
+            "n_frames": int(flow.shape[0]),
+            "dims": int(flow.shape[1]),
+            "descriptors": schema,
+            "cache_key": key,
+        }
+        if store is not None:
+            store.put(vid, flow, meta)
+        else:
+            out = os.path.join(OUT_DIR, f"{vid}_motion.pt")
+            torch.save(flow, out)
+            with open(meta_path(out), "w") as f:
+                json.dump(meta, f, indent=2)
+            if cfg["manifest"]["enabled"]:
+                record_output(OUT_DIR, "motion", vid, out, flow.shape, meta=meta)
+
+    videos, keys = {}, {}
+    for vid in cfg["videos"]:
+        path = os.path.join(VIDEO_DIR, f"{vid}.mp4")
+        if not os.path.exists(path):
+            continue
+
+        key = target_key_of(path)
+        if written_key(vid) == key:
+            print(f"⏩ Skipping {vid} (up to date)")
+            continue
+
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            print(f"♻️ {vid}: reusing cached targets")
+            write(vid, path, cached, key)
+            continue
+
+        videos[vid], keys[vid] = path, key
+
+    def save(vid, flow):
+        if flow is None:
+            return
+        write(vid, videos[vid], flow, keys[vid])
+        if cache is not None:
+            cache.put(keys[vid], flow)
+
+    extract_motion_targets(
+        videos,
+        save,
+        resize,
+        cfg["parallel"]["num_workers"],
+        cfg["parallel"]["chunk_frames"],
+        schema
+    )
+
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
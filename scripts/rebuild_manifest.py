@@ -0,0 +1,27 @@
+import os
+import sys
+import argparse
+
+# ============================================================
+# Ensure repository root is on PYTHONPATH
+# ============================================================
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.io.manifest import SCANNERS, rebuild_manifest, manifest_path
+
+# ============================================================
+# Arguments
+# ============================================================
+parser = argparse.ArgumentParser(
+    description="Regenerate an output tree's manifest.jsonl from a directory scan"
+)
+parser.add_argument("root", help="Output root (e.g. fMRI_embeddings, w2v2_embeds)")
+parser.add_argument("modality", choices=list(SCANNERS))
+parser.add_argument("--no-checksum", action="store_true",
+                    help="Skip sha256 of every file (faster on slow mounts)")
+args = parser.parse_args()
+
+n = rebuild_manifest(args.root, args.modality, checksum=not args.no_checksum)
+print(f"✅ {n} {args.modality} entries → {manifest_path(args.root)}")
@@ -4,7 +4,10 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, ROOT)
 
 from src.audio.wav2vec2_model import load_wav2vec2
-from src.pipeline.audio_processor import process_audio
+from src.pipeline.audio_pipeline import run_audio_pipeline
+from src.pipeline.audio_processor import process_audio_streaming
+from src.io.packed_store import PackedStoreWriter
+from src.io.manifest import sync_manifest
 
 CFG_PATH = os.path.join(ROOT, "configs", "audio_embedding.yaml")
 with open(CFG_PATH) as f:
@@ -15,7 +18,9 @@ OUT_DIR = cfg["paths"]["output_embed_dir"]
 os.makedirs(OUT_DIR, exist_ok=True)
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
-processor, model = load_wav2vec2(cfg["model"]["name"], device)
+processor, model = load_wav2vec2(
+    cfg["model"]["name"], device, cfg["model"]["precision"], cfg["model"]["layers"]
+)
 
 AUDIO_EXTS = {".wav", ".mp3", ".flac", ".ogg", ".m4a"}
 files = [os.path.join(IN_DIR, f) for f in sorted(os.listdir(IN_DIR))
@@ -23,7 +28,23 @@ files = [os.path.join(IN_DIR, f) for f in sorted(os.listdir(IN_DIR))
 
 print(f"Found {len(files)} audio files.")
 
-for p in files:
-    process_audio(p, OUT_DIR, processor, model, cfg, device)
+# record embeddings written before the manifest was enabled
+if cfg["manifest"]["enabled"] and not cfg["store"]["enabled"]:
+    sync_manifest(OUT_DIR, "audio")
+
+store = None
+if cfg["store"]["enabled"]:
+    store = PackedStoreWriter(cfg["store"]["dir"], meta={"modality": "audio"})
+
+if cfg["streaming"]["enabled"]:
+    for p in files:
+        process_audio_streaming(p, OUT_DIR, processor, model, cfg, device, store)
+else:
+    errors = run_audio_pipeline(files, OUT_DIR, processor, model, cfg, device, store)
+    if errors:
+        print(f"⚠️ {len(errors)} file(s) failed")
+
+if store is not None:
+    store.close()
 
 print("✅ Audio embedding pipeline completed.")
\ No newline at end of file
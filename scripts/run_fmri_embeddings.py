@@ -1,6 +1,7 @@
 import os
 import sys
 import yaml
+import pandas as pd
 
 # ============================================================
 # Ensure repository root is on PYTHONPATH
@@ -13,84 +14,231 @@ if ROOT_DIR not in sys.path:
 # Imports from src/
 # ============================================================
 from src.pipeline.segment_finder import find_seg_dirs
-from src.pipeline.segment_processor import process_segment
-
-# ============================================================
-# Load configuration
-# ============================================================
-CONFIG_PATH = os.path.join(ROOT_DIR, "configs", "fmri_embedding.yaml")
-
-if not os.path.exists(CONFIG_PATH):
-    raise FileNotFoundError(f"Config file not found: {CONFIG_PATH}")
-
-with open(CONFIG_PATH, "r") as f:
-    cfg = yaml.safe_load(f)
+from src.pipeline.segment_processor import list_runs
+from src.pipeline.scheduler import plan_jobs, run_jobs, fit_bases
+from src.fmri.mask import get_mask_index
+from src.fmri.basis import basis_exists, basis_key
+from src.io.packed_store import PackedStoreWriter
+from src.io.manifest import sync_manifest
+
+
+def main():
+    # ============================================================
+    # Load configuration
+    # ============================================================
+    CONFIG_PATH = os.path.join(ROOT_DIR, "configs", "fmri_embedding.yaml")
+
+    if not os.path.exists(CONFIG_PATH):
+        raise FileNotFoundError(f"Config file not found: {CONFIG_PATH}")
+
+    with open(CONFIG_PATH, "r") as f:
+        cfg = yaml.safe_load(f)
+
+    FMRI_ROOT = cfg["paths"]["fmri_root"]
+    OUT_ROOT = cfg["paths"]["output_root"]
+
+    print("==============================================")
+    print("Running fMRI Embedding Pipeline")
+    print(f"FMRI_ROOT : {FMRI_ROOT}")
+    print(f"OUT_ROOT  : {OUT_ROOT}")
+    print("==============================================\n")
+
+    basis_cfg = cfg["basis"]
+    if basis_cfg["mode"] == "group" and cfg["mask"]["enabled"] and not cfg["mask"]["path"]:
+        raise ValueError("basis.mode=group needs a shared mask (set mask.path)")
+
+    jobs, records, basis_specs = [], [], {}
+
+    # Outputs are recorded in a manifest so datasets do not have to scan the
+    # tree; segments written before it was enabled are recorded first
+    manifest_root = OUT_ROOT if cfg["manifest"]["enabled"] else None
+    if manifest_root:
+        n = sync_manifest(manifest_root, "fmri")
+        if n:
+            print(f"📒 Recorded {n} existing segment embedding(s) in the manifest")
+
+    # Segment embeddings go to one packed store instead of per-segment .pt files
+    store = None
+    if cfg["store"]["enabled"]:
+        store = PackedStoreWriter(cfg["store"]["dir"], meta={"modality": "fmri"})
+
+    # ============================================================
+    # Plan (subject, segment, run) jobs
+    # ============================================================
+    for subject in sorted(os.listdir(FMRI_ROOT)):
+        subject_root = os.path.join(
+            FMRI_ROOT,
+            subject,
+            "video_fmri_dataset",
+            subject,
+            "fmri"
+        )
+
+        if not os.path.isdir(subject_root):
+            continue
 
-FMRI_ROOT = cfg["paths"]["fmri_root"]
-OUT_ROOT = cfg["paths"]["output_root"]
+        print(f"\n🔹 Planning subject: {subject}")
 
-print("==============================================")
-print("Running fMRI Embedding Pipeline")
-print(f"FMRI_ROOT : {FMRI_ROOT}")
-print(f"OUT_ROOT  : {OUT_ROOT}")
-print("==============================================\n")
+        # --------------------------------------------------------
+        # Recursively find all segment directories (cached until the
+        # subject tree gains or loses a directory)
+        # --------------------------------------------------------
+        seg_dirs = find_seg_dirs(
+            subject_root, os.path.join(OUT_ROOT, subject, ".segment_dirs.json")
+        )
 
-# ============================================================
-# Iterate over subjects
-# ============================================================
-for subject in sorted(os.listdir(FMRI_ROOT)):
-    subject_root = os.path.join(
-        FMRI_ROOT,
-        subject,
-        "video_fmri_dataset",
-        subject,
-        "fmri"
-    )
-
-    if not os.path.isdir(subject_root):
-        continue
-
-    print(f"\n🔹 Processing subject: {subject}")
-
-    # --------------------------------------------------------
-    # Recursively find all segment directories
-    # --------------------------------------------------------
-    seg_dirs = find_seg_dirs(subject_root)
-
-    if not seg_dirs:
-        print("   ⚠️ No segments found")
-        continue
-
-    # --------------------------------------------------------
-    # Process each segment
-    # --------------------------------------------------------
-    for seg_dir in seg_dirs:
-        seg_name = os.path.basename(seg_dir)
-
-        out_dir = os.path.join(OUT_ROOT, subject, seg_name)
-        avg_out = os.path.join(out_dir, f"{seg_name}_avg_embeddings.pt")
-
-        # -------------------------
-        # Skip if already processed
-        # -------------------------
-        if os.path.exists(avg_out):
-            print(f"   ⏩ Skipping {seg_name} (already processed)")
+        if not seg_dirs:
+            print("   ⚠️ No segments found")
             continue
 
-        print(f"   ▶ Segment: {seg_name}")
-
-        try:
-            process_segment(
-                seg_dir=seg_dir,
-                subject_name=subject,
-                output_root=OUT_ROOT,
-                use_mni=cfg["use_mni"],
-                normalize_per_run=cfg["normalize_per_run"],
-                merge=cfg["merge_runs"],
-                n_components=cfg["n_components"],
-                batch_size=cfg["batch_size"],
+        # --------------------------------------------------------
+        # Optional brain mask (built once per subject/space, cached)
+        # --------------------------------------------------------
+        voxel_index = None
+        mask_cfg = cfg["mask"]
+
+        if mask_cfg["enabled"]:
+            space = "mni" if cfg["use_mni"] else "raw"
+            reference = None
+
+            if not mask_cfg["path"]:
+                runs = sorted(list_runs(seg_dirs[0], cfg["use_mni"]))
+                reference = runs[0] if runs else None
+
+            voxel_index = get_mask_index(
+                mask_cfg["cache_dir"],
+                subject,
+                space,
+                mask_path=mask_cfg["path"],
+                reference_nifti=reference,
+                intensity_frac=mask_cfg["intensity_frac"],
+                min_std=mask_cfg["min_std"],
             )
-        except Exception as e:
-            print(f"   ❌ Error processing {subject}/{seg_name}: {e}")
-
-print("\n✅ fMRI embedding pipeline completed.")
\ No newline at end of file
+            print(f"   🧠 Mask: {len(voxel_index)} in-mask voxels")
+
+        # --------------------------------------------------------
+        # Shared PCA basis (fitted once over the training runs)
+        # --------------------------------------------------------
+        basis_dir = None
+        if basis_cfg["mode"] == "subject":
+            basis_dir = os.path.join(OUT_ROOT, subject, "pca_basis")
+        elif basis_cfg["mode"] == "group":
+            basis_dir = os.path.join(OUT_ROOT, "group_pca_basis")
+
+        # runs are collected for every basis; ones already fitted on the
+        # same inputs are dropped once all subjects are planned
+        if basis_dir:
+            spec = basis_specs.setdefault(basis_dir, {
+                "name": subject if basis_cfg["mode"] == "subject" else "group",
+                "basis_dir": basis_dir,
+                "nii_paths": [],
+                "voxel_index": voxel_index,
+            })
+            for seg_dir in seg_dirs:
+                if os.path.basename(seg_dir).startswith(basis_cfg["fit_prefix"]):
+                    spec["nii_paths"].extend(sorted(list_runs(seg_dir, cfg["use_mni"])))
+
+        # --------------------------------------------------------
+        # Expand segments into run jobs (skip if already processed)
+        # --------------------------------------------------------
+        subj_jobs, skipped = plan_jobs(
+            subject, seg_dirs, OUT_ROOT, cfg["use_mni"], voxel_index, basis_dir, store
+        )
+        for rec in skipped:
+            print(f"   ⏩ Skipping {rec['segment']} (already processed)")
+
+        jobs.extend(subj_jobs)
+        records.extend(skipped)
+
+    par = cfg["parallel"]
+    cache = None
+    if cfg["cache"]["enabled"]:
+        cache = {
+            "cache_dir": cfg["cache"]["dir"],
+            "max_size_gb": cfg["cache"]["max_size_gb"],
+            "chunk_trs": cfg["loader"]["chunk_trs"],
+        }
+
+    # ============================================================
+    # Fit missing or stale shared bases before projecting
+    # ============================================================
+    for basis_dir, spec in list(basis_specs.items()):
+        spec["key"] = basis_key(
+            spec["nii_paths"], cfg["n_components"], cfg["normalize_per_run"],
+            cfg["use_mni"], spec["voxel_index"]
+        )
+        if basis_exists(basis_dir, spec["key"]):
+            del basis_specs[basis_dir]
+        elif basis_exists(basis_dir):
+            print(f"   ♻️ Refitting {basis_dir} (fitted on different runs / settings)")
+
+    if basis_specs:
+        print(f"\n▶ Fitting {len(basis_specs)} shared PCA basis(es)")
+        basis_records = fit_bases(
+            list(basis_specs.values()),
+            fit_kwargs={
+                "n_components": cfg["n_components"],
+                "batch_size": cfg["batch_size"],
+                "normalize_per_run": cfg["normalize_per_run"],
+                "chunk_trs": cfg["loader"]["chunk_trs"],
+                "cache": cache,
+            },
+            num_workers=par["num_workers"],
+            threads_per_worker=par["threads_per_worker"],
+        )
+        records.extend(basis_records)
+
+        failed = {
+            spec["basis_dir"]
+            for spec, rec in zip(basis_specs.values(), basis_records)
+            if rec["status"] != "done"
+        }
+        jobs = [job for job in jobs if job["basis_dir"] not in failed]
+
+    # ============================================================
+    # Run jobs across the process pool
+    # ============================================================
+    print(f"\n▶ {len(jobs)} runs | workers={par['num_workers']}")
+
+    records.extend(run_jobs(
+        jobs,
+        run_kwargs={
+            "normalize_per_run": cfg["normalize_per_run"],
+            "n_components": cfg["n_components"],
+            "batch_size": cfg["batch_size"],
+            "streaming": cfg["loader"]["streaming"],
+            "chunk_trs": cfg["loader"]["chunk_trs"],
+            "decomposition": cfg["decomposition"],
+            "cache": cache,
+        },
+        merge=cfg["merge_runs"],
+        num_workers=par["num_workers"],
+        memory_budget_mb=par["memory_budget_mb"],
+        threads_per_worker=par["threads_per_worker"],
+        store=store,
+        manifest_root=manifest_root,
+    ))
+
+    if store is not None:
+        store.close()
+
+    # ============================================================
+    # Per-job summary
+    # ============================================================
+    df = pd.DataFrame(records)
+    os.makedirs(OUT_ROOT, exist_ok=True)
+    report_path = os.path.join(OUT_ROOT, "fmri_embedding_jobs.csv")
+    df.to_csv(report_path, index=False)
+
+    if not df.empty:
+        print("\n" + df["status"].value_counts().to_string())
+        for _, row in df[df["status"] == "failed"].iterrows():
+            print(f"   ❌ {row['subject']}/{row['segment']}/{row['run']}: "
+                  f"{row['error'].splitlines()[0]}")
+
+    print(f"\n📄 Job report: {report_path}")
+    print("\n✅ fMRI embedding pipeline completed.")
+
+
+if __name__ == "__main__":
+    main()
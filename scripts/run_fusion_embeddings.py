@@ -7,6 +7,10 @@ sys.path.insert(0, ROOT)
 
 from src.fusion.dataset import FMRI_AudioFusionDataset
 from src.fusion.model import CrossAttentionFusion
+from src.utils.sample_cache import CachedDataset
+from src.utils.sequence_windows import pad_collate
+from src.io.packed_store import PackedStoreWriter, entry_key
+from src.io.manifest import record_output, sync_manifest
 
 # --------------------------------------------------
 # Load config
@@ -23,13 +27,20 @@ dataset = FMRI_AudioFusionDataset(
     cfg["paths"]["csv"],
     cfg["paths"]["fmri_root"],
     cfg["paths"]["audio_root"],
-    cfg["sequence_length"]
+    cfg["sequence_length"],
+    cfg["model"]["d_f"],
+    cfg["alignment"]["mode"],
+    cfg["audio"]["win_sec"],
+    cfg["audio"]["layers"]
 )
+if cfg["cache"]["enabled"]:
+    dataset = CachedDataset(dataset, cfg["cache"]["max_mb"])
 
 loader = DataLoader(
     dataset,
     batch_size=cfg["batch_size"],
-    shuffle=False
+    shuffle=False,
+    collate_fn=pad_collate
 )
 
 # --------------------------------------------------
@@ -40,15 +51,42 @@ model = CrossAttentionFusion(**cfg["model"]).to(device).eval()
 out_root = cfg["paths"]["output_root"]
 os.makedirs(out_root, exist_ok=True)
 
+store = None
+if cfg["store"]["enabled"]:
+    store = PackedStoreWriter(cfg["store"]["dir"], meta={"modality": "fusion"})
+elif cfg["manifest"]["enabled"]:
+    # record embeddings fused before the manifest was enabled
+    sync_manifest(out_root, "fusion")
+
 # --------------------------------------------------
 # Fusion loop (FIXED)
 # --------------------------------------------------
 with torch.no_grad():
-    for fmri, audio, subs, segs in tqdm(loader, desc="Fusing"):
-        fmri, audio = fmri.to(device), audio.to(device)
-        fused, _ = model(fmri, audio)
+    for fmri, audio, subs, segs, mask in tqdm(loader, desc="Fusing"):
+        fmri, audio, mask = fmri.to(device), audio.to(device), mask.to(device)
+        fused, _ = model(fmri, audio, key_padding_mask=mask)
+        # drop the padded steps of shorter segments
+        fused = [f[~m] for f, m in zip(fused, mask)]
 
         for i in range(len(subs)):
+            meta = {
+                "subject": subs[i],
+                "segment": segs[i],
+                "n_tr": int(fused[i].shape[0]),
+                "embedding_dim": int(fused[i].shape[1]),
+                "model": "CrossAttentionFusion",
+                "status": "success"
+            }
+
+            if store is not None:
+                key = entry_key(subs[i], segs[i])
+                if key in store:
+                    print(f"⏩ Skipping {subs[i]}/{segs[i]} (already fused)")
+                    continue
+                store.put(key, fused[i], meta)
+                print(f"✅ Saved {subs[i]}/{segs[i]}")
+                continue
+
             out_dir = os.path.join(out_root, subs[i])
             os.makedirs(out_dir, exist_ok=True)
 
@@ -65,18 +103,18 @@ with torch.no_grad():
             torch.save(fused[i].cpu(), out_path)
 
             # metadata (same as Colab)
-            meta = {
-                "subject": subs[i],
-                "segment": segs[i],
-                "n_tr": int(fused[i].shape[0]),
-                "embedding_dim": int(fused[i].shape[1]),
-                "model": "CrossAttentionFusion",
-                "status": "success"
-            }
-
             with open(out_path.replace("_embeddings.pt", "_meta.json"), "w") as f:
                 json.dump(meta, f, indent=2)
 
+            if cfg["manifest"]["enabled"]:
+                record_output(
+                    out_root, "fusion", entry_key(subs[i], segs[i]), out_path,
+                    fused[i].shape, meta=meta
+                )
+
             print(f"✅ Saved {subs[i]}/{segs[i]}")
 
+if store is not None:
+    store.close()
+
 print("✅ Fusion pipeline completed.")
\ No newline at end of file
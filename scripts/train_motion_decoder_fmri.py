@@ -1,60 +1,69 @@
 import yaml, torch, os
-from torch.utils.data import DataLoader
 from src.motion.dataset_fmri import FMRI_MotionDataset
 from src.motion.model import MotionDecoder
+from src.motion.descriptors import motion_dim
+from src.motion.checkpoint import CheckpointManager
+from src.motion.trainer import build_dataset, build_loader, train_motion_decoder
+from src.utils.distributed import init_distributed, is_main_process, cleanup_distributed
 
-# ============================================================
-# Load config
-# ============================================================
-cfg = yaml.safe_load(open("configs/motion_decoder_fmri.yaml"))
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-# ============================================================
-# Dataset & DataLoader
-# ============================================================
-ds = FMRI_MotionDataset(
-    cfg["paths"]["fmri_root"],
-    cfg["paths"]["motion_dir"],
-    cfg["training"]["seq_len"]
-)
-dl = DataLoader(ds, cfg["training"]["batch_size"], shuffle=True)
-
-# ============================================================
-# Model
-# ============================================================
-model = MotionDecoder(**cfg["model"]).to(device)
-opt = torch.optim.AdamW(model.parameters(), lr=cfg["training"]["lr"])
-loss_fn = torch.nn.MSELoss()
-
-# ============================================================
-# ✅ Skip / Resume logic (ONLY addition)
-# ============================================================
-model_path = os.path.join(
-    cfg["paths"]["model_dir"],
-    "motion_decoder_fmri_only_allsubj.pth"
-)
-
-if os.path.exists(model_path):
-    model.load_state_dict(torch.load(model_path, map_location=device))
-    print(f"⏩ Found existing model, resuming from: {model_path}")
-else:
-    print("🚀 No existing model found, training from scratch.")
-
-# ============================================================
-# Training loop
-# ============================================================
-for ep in range(cfg["training"]["epochs"]):
-    model.train()
-    for x, y in dl:
-        x, y = x.to(device), y.to(device)
-        loss = loss_fn(model(x), y)
-        opt.zero_grad()
-        loss.backward()
-        opt.step()
-    print(f"Epoch {ep+1} | Loss {loss.item():.6f}")
-
-# ============================================================
-# Save model
-# ============================================================
-torch.save(model.state_dict(), model_path)
-print(f"✅ Model saved to: {model_path}")
\ No newline at end of file
+
+def main():
+    # ============================================================
+    # Load config
+    # ============================================================
+    cfg = yaml.safe_load(open("configs/motion_decoder_fmri.yaml"))
+    # single process, or one rank of a torchrun launch (gloo DDP)
+    _, _, device = init_distributed(cfg["training"]["dist_backend"])
+
+    # ============================================================
+    # Dataset & DataLoader
+    # ============================================================
+    ds = build_dataset(FMRI_MotionDataset, cfg["paths"]["fmri_root"], cfg)
+    dl = build_loader(ds, cfg, device)
+
+    # ============================================================
+    # Model
+    # ============================================================
+    if cfg["model"]["d_motion"] == "auto":
+        cfg["model"]["d_motion"] = motion_dim(cfg["paths"]["motion_dir"])
+    model = MotionDecoder(**cfg["model"]).to(device)
+
+    # ============================================================
+    # ✅ Skip / Resume logic (ONLY addition)
+    # ============================================================
+    model_path = os.path.join(
+        cfg["paths"]["model_dir"],
+        "motion_decoder_fmri_only_allsubj.pth"
+    )
+
+    checkpoints = CheckpointManager(
+        cfg["checkpoint"]["dir"],
+        "motion_decoder_fmri_only",
+        cfg["checkpoint"]["keep_last"]
+    )
+
+    # a training checkpoint (restored by train_motion_decoder) takes
+    # precedence over bare final weights
+    if checkpoints.latest() is None:
+        if os.path.exists(model_path):
+            model.load_state_dict(torch.load(model_path, map_location=device))
+            print(f"⏩ Found existing model, resuming from: {model_path}")
+        elif is_main_process():
+            print("🚀 No existing model found, training from scratch.")
+
+    # ============================================================
+    # Training loop
+    # ============================================================
+    train_motion_decoder(model, dl, cfg, device, checkpoints)
+
+    # ============================================================
+    # Save model
+    # ============================================================
+    if is_main_process():
+        torch.save(model.state_dict(), model_path)
+        print(f"✅ Model saved to: {model_path}")
+    cleanup_distributed()
+
+
+if __name__ == "__main__":
+    main()
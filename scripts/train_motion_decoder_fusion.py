@@ -1,32 +1,40 @@
 import yaml, torch, os
-from torch.utils.data import DataLoader
 from src.motion.dataset_fusion import Fusion_MotionDataset
 from src.motion.model import MotionDecoder
+from src.motion.descriptors import motion_dim
+from src.motion.checkpoint import CheckpointManager
+from src.motion.trainer import build_dataset, build_loader, train_motion_decoder
+from src.utils.distributed import init_distributed, is_main_process, cleanup_distributed
 
-cfg = yaml.safe_load(open("configs/motion_decoder_fusion.yaml"))
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-ds = Fusion_MotionDataset(
-    cfg["paths"]["fusion_root"],
-    cfg["paths"]["motion_dir"],
-    cfg["training"]["seq_len"]
-)
-dl = DataLoader(ds, cfg["training"]["batch_size"], shuffle=True)
-
-model = MotionDecoder(**cfg["model"]).to(device)
-opt = torch.optim.AdamW(model.parameters(), lr=cfg["training"]["lr"])
-loss_fn = torch.nn.MSELoss()
-
-ckpt = os.path.join(cfg["paths"]["model_dir"], "motion_decoder_fusion_allsubj.pth")
-if os.path.exists(ckpt):
-    model.load_state_dict(torch.load(ckpt))
-    print("🔄 Resuming training from saved checkpoint.")
-
-for ep in range(cfg["training"]["epochs"]):
-    for x,y in dl:
-        x,y = x.to(device), y.to(device)
-        loss = loss_fn(model(x), y)
-        opt.zero_grad(); loss.backward(); opt.step()
-    print(f"Epoch {ep+1} | Loss {loss.item():.6f}")
-
-torch.save(model.state_dict(), ckpt)
+
+def main():
+    cfg = yaml.safe_load(open("configs/motion_decoder_fusion.yaml"))
+    # single process, or one rank of a torchrun launch (gloo DDP)
+    _, _, device = init_distributed(cfg["training"]["dist_backend"])
+
+    ds = build_dataset(Fusion_MotionDataset, cfg["paths"]["fusion_root"], cfg)
+    dl = build_loader(ds, cfg, device)
+
+    if cfg["model"]["d_motion"] == "auto":
+        cfg["model"]["d_motion"] = motion_dim(cfg["paths"]["motion_dir"])
+    model = MotionDecoder(**cfg["model"]).to(device)
+
+    ckpt = os.path.join(cfg["paths"]["model_dir"], "motion_decoder_fusion_allsubj.pth")
+    checkpoints = CheckpointManager(
+        cfg["checkpoint"]["dir"],
+        "motion_decoder_fusion",
+        cfg["checkpoint"]["keep_last"]
+    )
+    if checkpoints.latest() is None and os.path.exists(ckpt):
+        model.load_state_dict(torch.load(ckpt, map_location=device))
+        print("🔄 Resuming training from saved checkpoint.")
+
+    train_motion_decoder(model, dl, cfg, device, checkpoints)
+
+    if is_main_process():
+        torch.save(model.state_dict(), ckpt)
+    cleanup_distributed()
+
+
+if __name__ == "__main__":
+    main()
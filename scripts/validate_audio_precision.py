@@ -0,0 +1,90 @@
+import os
+import sys
+import copy
+import time
+import argparse
+import yaml
+import torch.nn.functional as F
+
+# ============================================================
+# Ensure repository root is on PYTHONPATH
+# ============================================================
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.audio.wav2vec2_model import PRECISIONS, load_wav2vec2, apply_precision
+from src.audio.wav2vec2_frames import extract_frames_chunked
+from src.io.audio_loader import load_audio_16k
+from src.pipeline.audio_processor import pool_embeddings
+
+# ============================================================
+# Arguments
+# ============================================================
+parser = argparse.ArgumentParser(
+    description="Throughput and fp32 agreement of the wav2vec2 precision modes"
+)
+parser.add_argument("audio", help="Held-out audio file")
+parser.add_argument("--config", default=os.path.join(ROOT_DIR, "configs", "audio_embedding.yaml"))
+parser.add_argument("--seconds", type=float, default=None, help="Only use the first N seconds")
+parser.add_argument("--modes", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+parser.add_argument("--device", default="cpu")
+args = parser.parse_args()
+
+with open(args.config) as f:
+    cfg = yaml.safe_load(f)
+
+wav = load_audio_16k(args.audio)
+if args.seconds:
+    wav = wav[: int(args.seconds * 16000)]
+audio_sec = wav.numel() / 16000
+
+processor, base = load_wav2vec2(
+    cfg["model"]["name"], args.device, "fp32", cfg["model"]["layers"]
+)
+
+
+def extract(model):
+    return extract_frames_chunked(
+        wav,
+        processor,
+        model,
+        cfg["model"]["frame_hz"],
+        cfg["chunking"]["chunk_sec"],
+        cfg["chunking"]["overlap_sec"],
+        args.device,
+        layers=cfg["model"]["layers"]
+    )
+
+
+# ============================================================
+# Reference
+# ============================================================
+t0 = time.perf_counter()
+H_ref = extract(base)
+t_ref = time.perf_counter() - t0
+W_ref = pool_embeddings(H_ref, cfg)
+
+print(f"Audio: {audio_sec:.1f}s | frames={H_ref.shape[0]} | windows={W_ref.shape[0]}\n")
+print(f"{'mode':<8}{'time [s]':>10}{'x realtime':>12}{'speedup':>10}"
+      f"{'frame cos mean':>16}{'frame cos min':>15}{'window |dz| mean':>18}{'window |dz| max':>17}")
+
+# ============================================================
+# Modes
+# ============================================================
+for mode in args.modes:
+    if mode == "fp32":
+        H, elapsed = H_ref, t_ref
+    else:
+        model = apply_precision(copy.deepcopy(base), mode, args.device)
+        t0 = time.perf_counter()
+        H = extract(model)
+        elapsed = time.perf_counter() - t0
+
+    W = pool_embeddings(H, cfg)
+    cos = F.cosine_similarity(H, H_ref, dim=1)
+    dz = (W - W_ref).abs()
+
+    print(f"{mode:<8}{elapsed:>10.2f}{audio_sec / elapsed:>12.1f}{t_ref / elapsed:>10.2f}"
+          f"{float(cos.mean()):>16.5f}{float(cos.min()):>15.5f}"
+          f"{float(dz.mean()):>18.4f}{float(dz.max()):>17.4f}")
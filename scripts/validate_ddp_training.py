@@ -0,0 +1,98 @@
+import os
+import sys
+import copy
+import torch
+import torch.distributed as dist
+from torch.utils.data import DistributedSampler
+
+# ============================================================
+# Ensure repository root is on PYTHONPATH
+# ============================================================
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.motion.model import MotionDecoder
+from src.motion.metrics import masked_mse_loss
+from src.motion.trainer import build_loader, train_motion_decoder
+from src.utils.distributed import init_distributed, is_main_process, cleanup_distributed
+
+# ============================================================
+# Checks gloo DDP training of the motion decoder on CPU processes:
+#
+#   torchrun --nproc_per_node=4 scripts/validate_ddp_training.py
+#
+# One epoch with one optimizer step per rank must match a single-process
+# step on the union of all rank batches, and all ranks must end up with
+# identical weights.
+# ============================================================
+rank, world_size, _ = init_distributed("gloo")
+device = "cpu"
+B, T, D_MODEL, D_MOTION = 4, 16, 32, 2
+
+gen = torch.Generator().manual_seed(0)
+data = [
+    (torch.randn(T, D_MODEL, generator=gen), torch.randn(T, D_MOTION, generator=gen))
+    for _ in range(B * world_size)
+]
+
+torch.manual_seed(0)
+model = MotionDecoder(D_MODEL, D_MOTION, n_layers=2, n_heads=4)
+# no dropout, so the step is deterministic
+for m in model.modules():
+    if isinstance(m, torch.nn.Dropout):
+        m.p = 0.0
+    elif isinstance(m, torch.nn.MultiheadAttention):
+        m.dropout = 0.0
+init = copy.deepcopy(model)
+
+cfg = {
+    "training": {
+        "batch_size": B, "epochs": 1, "lr": 1e-3, "lr_schedule": "constant",
+        "precision": "fp32", "compile": False, "grad_accum_steps": 1,
+        "num_workers": 0, "prefetch_factor": 2,
+    },
+}
+loader = build_loader(data, cfg, device)
+train_motion_decoder(model, loader, cfg, device)
+
+# ------------------------------------------------------------
+# Replica consistency
+# ------------------------------------------------------------
+flat = torch.cat([p.detach().flatten() for p in model.parameters()])
+gathered = [torch.empty_like(flat) for _ in range(world_size)] if world_size > 1 else [flat]
+if world_size > 1:
+    dist.all_gather(gathered, flat)
+
+if is_main_process():
+    spread = max((g - gathered[0]).abs().max().item() for g in gathered)
+    print(f"ranks: {world_size} | max weight difference across ranks: {spread:.3e}")
+
+    # --------------------------------------------------------
+    # Single-process reference on the union of the rank shards
+    # --------------------------------------------------------
+    idx = []
+    for r in range(world_size):
+        sampler = DistributedSampler(data, num_replicas=world_size, rank=r, shuffle=True)
+        sampler.set_epoch(0)
+        idx += list(sampler)
+    x = torch.stack([data[i][0] for i in idx])
+    y = torch.stack([data[i][1] for i in idx])
+
+    ref = init
+    ref.train()
+    opt = torch.optim.AdamW(ref.parameters(), lr=float(cfg["training"]["lr"]))
+    masked_mse_loss(ref(x), y).backward()
+    opt.step()
+
+    diff = max(
+        (a - b).abs().max().item()
+        for a, b in zip(model.parameters(), ref.parameters())
+    )
+    print(f"max weight difference vs single-process step: {diff:.3e}")
+    # Adam normalises every gradient, so parameters whose gradient is ~0
+    # turn reduction-order rounding into steps of a few % of lr
+    ok = spread == 0 and diff < 0.1 * float(cfg["training"]["lr"])
+    print("✅ DDP step matches" if ok else "❌ DDP step differs")
+
+cleanup_distributed()
@@ -1,2 +1,33 @@
+import numpy as np
+
+
 def zscore(W):
-    return (W - W.mean(0, keepdim=True)) / (W.std(0, keepdim=True) + 1e-6)
\ No newline at end of file
+    return (W - W.mean(0, keepdim=True)) / (W.std(0, keepdim=True) + 1e-6)
+
+
+def zscore_inplace(X, chunk_rows: int = 65536):
+    """
+    `zscore` of a (N, dims) array (e.g. a writable memmap) in place, in row
+    chunks: float64 column mean and unbiased std in two passes, then one
+    normalizing pass, so memory stays bounded by `chunk_rows`.
+    """
+    n = X.shape[0]
+    if n == 0:
+        return X
+
+    mean = np.zeros(X.shape[1], dtype=np.float64)
+    for i in range(0, n, chunk_rows):
+        mean += X[i:i + chunk_rows].sum(0, dtype=np.float64)
+    mean /= n
+
+    ssq = np.zeros(X.shape[1], dtype=np.float64)
+    for i in range(0, n, chunk_rows):
+        ssq += ((X[i:i + chunk_rows] - mean) ** 2).sum(0)
+    std = np.sqrt(ssq / (n - 1)) if n > 1 else np.full_like(ssq, np.nan)
+
+    mean, scale = mean.astype(X.dtype), (std + 1e-6).astype(X.dtype)
+    for i in range(0, n, chunk_rows):
+        block = X[i:i + chunk_rows]
+        block -= mean
+        block /= scale
+    return X
@@ -1,4 +1,5 @@
 import torch
+from src.utils.temporal import window_bounds, interval_means
 
 def pool_windows(H, frame_hz, win_sec, hop_sec):
     if H.numel() == 0:
@@ -7,13 +8,37 @@ def pool_windows(H, frame_hz, win_sec, hop_sec):
     win = int(win_sec * frame_hz)
     hop = int(hop_sec * frame_hz)
 
-    pooled = []
-    for s in range(0, H.size(0), hop):
-        seg = H[s:s+win]
-        if seg.numel() == 0:
-            break
-        pooled.append(seg.mean(dim=0, keepdim=True))
-        if s + win >= H.size(0):
-            break
+    starts, ends = window_bounds(H.size(0), win, hop)
+    return interval_means(H, starts, ends)
 
-    return torch.cat(pooled, dim=0)
\ No newline at end of file
+def iter_pool_windows(frame_blocks, frame_hz, win_sec, hop_sec):
+    """
+    Streaming `pool_windows`: yields (n, D) blocks of pooled windows as soon
+    as enough frames have arrived, keeping only frames still needed.
+    """
+    win = int(win_sec * frame_hz)
+    hop = int(hop_sec * frame_hz)
+
+    buf = None
+    base = 0  # global frame index of buf[0]
+    s = 0     # global start of the next window
+
+    for H in frame_blocks:
+        buf = H if buf is None else torch.cat([buf, H])
+        avail = base + buf.size(0)
+
+        n_ready = 0
+        while s + n_ready * hop + win < avail:
+            n_ready += 1
+        if n_ready:
+            starts = torch.arange(n_ready) * hop + (s - base)
+            yield interval_means(buf, starts, starts + win)
+            s += n_ready * hop
+            keep = min(s - base, buf.size(0))
+            buf, base = buf[keep:], base + keep
+
+    if buf is None or base + buf.size(0) <= s:
+        return
+
+    starts, ends = window_bounds(base + buf.size(0) - s, win, hop)
+    yield interval_means(buf, starts + (s - base), ends + (s - base))
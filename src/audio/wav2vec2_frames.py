@@ -1,5 +1,45 @@
 import torch
 
+
+def chunk_bounds(n: int, chunk_sec: float, overlap_sec: float, sr: int = 16000):
+    """
+    (start, end) sample bounds of the overlapping inference chunks.
+    """
+    chunk = int(chunk_sec * sr)
+    step = int((chunk_sec - overlap_sec) * sr)
+
+    bounds = []
+    for s in range(0, n, step):
+        e = min(n, s + chunk)
+        if e <= s:
+            break
+        bounds.append((s, e))
+        if e >= n:
+            break
+    return bounds
+
+
+def stitch_chunks(outs, drop: int, hidden_size: int):
+    # drop the overlapping leading frames of every chunk but the first
+    frames = []
+    for i, out in enumerate(outs):
+        if i > 0 and drop > 0 and out.size(0) > drop:
+            out = out[drop:]
+        frames.append(out)
+    return torch.cat(frames, dim=0) if frames else torch.zeros(0, hidden_size)
+
+
+def forward_hidden(model, inp, layers=None):
+    """
+    (B, T, D) hidden states of a forward pass: last_hidden_state, or the mean
+    of the selected hidden_states indices.
+    """
+    if not layers:
+        return model(**inp).last_hidden_state
+    hs = model(**inp, output_hidden_states=True).hidden_states
+    return torch.stack([hs[i].float() for i in layers]).mean(dim=0)
+
+
 @torch.no_grad()
 def extract_frames_chunked(
     wav,
@@ -8,32 +48,125 @@ def extract_frames_chunked(
     frame_hz: float,
     chunk_sec: float,
     overlap_sec: float,
-    device: str
+    device: str,
+    layers=None
 ):
     sr = 16000
-    n = wav.numel()
+    drop = int(overlap_sec * frame_hz)
+
+    outs = []
+    for s, e in chunk_bounds(wav.numel(), chunk_sec, overlap_sec, sr):
+        inp = processor(wav[s:e].numpy(), sampling_rate=16000, return_tensors="pt")
+        inp = {k: v.to(device) for k, v in inp.items()}
+        outs.append(forward_hidden(model, inp, layers).squeeze(0).cpu())
+
+    return stitch_chunks(outs, drop, model.config.hidden_size)
+
+
+@torch.no_grad()
+def extract_frames_batched(
+    wavs,
+    processor,
+    model,
+    frame_hz: float,
+    chunk_sec: float,
+    overlap_sec: float,
+    device: str,
+    batch_size: int = 8,
+    layers=None
+):
+    """
+    Batched counterpart of `extract_frames_chunked` for several waveforms.
+    Chunks of all files are grouped into batches and the hidden states are
+    scattered back per file. Layer-norm models whose feature extractor
+    returns attention masks get padded batches; otherwise only equal-length
+    chunks share a batch, since padding would change group-norm statistics.
+    """
+    sr = 16000
+    drop = int(overlap_sec * frame_hz)
+    use_mask = (
+        bool(getattr(processor.feature_extractor, "return_attention_mask", False))
+        and getattr(model.config, "feat_extract_norm", "group") == "layer"
+    )
+
+    chunks = []  # (file, chunk, start, end)
+    for fi, wav in enumerate(wavs):
+        for ci, (s, e) in enumerate(chunk_bounds(wav.numel(), chunk_sec, overlap_sec, sr)):
+            chunks.append((fi, ci, s, e))
+
+    groups = {}
+    for c in chunks:
+        groups.setdefault(0 if use_mask else c[3] - c[2], []).append(c)
+
+    batches = []
+    for group in groups.values():
+        group.sort(key=lambda c: c[3] - c[2], reverse=True)
+        batches += [group[i:i + batch_size] for i in range(0, len(group), batch_size)]
+
+    outs = {}
+    for batch in batches:
+        segs = [wavs[fi][s:e].numpy() for fi, _, s, e in batch]
+        inp = processor(
+            segs,
+            sampling_rate=16000,
+            return_tensors="pt",
+            padding=True,
+            return_attention_mask=use_mask
+        )
+        inp = {k: v.to(device) for k, v in inp.items()}
+        hidden = forward_hidden(model, inp, layers).cpu()
+
+        lengths = model._get_feat_extract_output_lengths(
+            torch.tensor([len(seg) for seg in segs])
+        )
+        for (fi, ci, _, _), h, L in zip(batch, hidden, lengths.tolist()):
+            outs[(fi, ci)] = h[:L]
+
+    results = []
+    for fi in range(len(wavs)):
+        file_outs = [outs[(f, ci)] for f, ci, _, _ in chunks if f == fi]
+        results.append(stitch_chunks(file_outs, drop, model.config.hidden_size))
+    return results
+
+
+@torch.no_grad()
+def iter_frames_chunked(
+    wav_blocks,
+    processor,
+    model,
+    frame_hz: float,
+    chunk_sec: float,
+    overlap_sec: float,
+    device: str,
+    layers=None
+):
+    """
+    Streaming counterpart of `extract_frames_chunked`: consumes an iterable
+    of waveform blocks and yields each chunk's trimmed hidden states as soon
+    as it is computed, carrying only the unprocessed tail between chunks.
+    """
+    sr = 16000
     chunk = int(chunk_sec * sr)
     step = int((chunk_sec - overlap_sec) * sr)
     drop = int(overlap_sec * frame_hz)
 
-    frames = []
-    first = True
-    for s in range(0, n, step):
-        e = min(n, s + chunk)
-        seg = wav[s:e]
-        if seg.numel() == 0:
-            break
-
+    def run(seg, first):
         inp = processor(seg.numpy(), sampling_rate=16000, return_tensors="pt")
         inp = {k: v.to(device) for k, v in inp.items()}
-        out = model(**inp).last_hidden_state.squeeze(0).cpu()
-
+        out = forward_hidden(model, inp, layers).squeeze(0).cpu()
         if not first and drop > 0 and out.size(0) > drop:
             out = out[drop:]
+        return out
 
-        frames.append(out)
-        first = False
-        if e >= n:
-            break
+    buf = torch.zeros(0)
+    first = True
+    for block in wav_blocks:
+        buf = torch.cat([buf, block])
+        # a chunk is final only once the stream ends, so require lookahead
+        while buf.numel() > chunk:
+            yield run(buf[:chunk], first)
+            first = False
+            buf = buf[step:]
 
-    return torch.cat(frames, dim=0) if frames else torch.zeros(0, model.config.hidden_size)
\ No newline at end of file
+    if buf.numel() > 0:
+        yield run(buf, first)
@@ -1,7 +1,74 @@
+import functools
 import torch
 from transformers import Wav2Vec2Processor, Wav2Vec2Model
 
-def load_wav2vec2(model_name: str, device: str):
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def _autocast_bf16(model, device: str):
+    # run the forward under bf16 autocast but hand float32 states downstream
+    forward = model.forward
+    device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+
+    @functools.wraps(forward)
+    def wrapped(*args, **kwargs):
+        with torch.autocast(device_type=device_type, dtype=torch.bfloat16):
+            out = forward(*args, **kwargs)
+        out.last_hidden_state = out.last_hidden_state.float()
+        return out
+
+    model.forward = wrapped
+    return model
+
+
+def apply_precision(model, precision: str, device: str):
+    """
+    precision: "fp32", "bf16" (autocast, linear/conv in bfloat16) or "int8"
+    (dynamically quantized nn.Linear layers, CPU only).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Available: {PRECISIONS}")
+    if precision == "int8" and str(device) != "cpu":
+        raise ValueError("int8 dynamic quantization is only supported on CPU")
+
+    if precision == "bf16":
+        return _autocast_bf16(model, device)
+    if precision == "int8":
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+def truncate_layers(model, n_layers: int):
+    """
+    Drops the transformer layers above `n_layers` so the forward pass stops
+    there; hidden_states[0..n_layers] are unchanged. Stable-layer-norm
+    encoders (e.g. large-lv60) apply encoder.layer_norm to their last
+    hidden state in some transformers versions, so one extra layer is
+    kept for them to leave hidden_states[n_layers] un-normalized. At
+    least one layer is kept, since hidden states are recorded per layer.
+    """
+    total = len(model.encoder.layers)
+    if not 0 <= n_layers <= total:
+        raise ValueError(f"Cannot keep {n_layers} of {total} transformer layers")
+    extra = 1 if model.config.do_stable_layer_norm else 0
+    n_layers = min(max(n_layers + extra, 1), total)
+
+    model.encoder.layers = model.encoder.layers[:n_layers]
+    model.config.num_hidden_layers = n_layers
+    return model
+
+
+def load_wav2vec2(model_name: str, device: str, precision: str = "fp32", layers=None):
+    """
+    layers: hidden-state indices to extract (0 = transformer input, i = output
+    of layer i). The model is truncated after the highest one; None keeps the
+    full stack and its last_hidden_state.
+    """
     processor = Wav2Vec2Processor.from_pretrained(model_name)
-    model = Wav2Vec2Model.from_pretrained(model_name).to(device).eval()
-    return processor, model
\ No newline at end of file
+    model = Wav2Vec2Model.from_pretrained(model_name)
+    if layers:
+        model = truncate_layers(model, max(layers))
+    model = model.to(device).eval()
+    return processor, apply_precision(model, precision, device)
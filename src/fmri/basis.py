@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import shutil
+import numpy as np
+import torch
+from functools import lru_cache
+from tqdm import tqdm
+from sklearn.decomposition import IncrementalPCA
+
+from src.io.nifti_loader import NiftiBlockStream
+from src.io.nifti_cache import NiftiCache
+from src.fmri.decomposition import iter_batches
+
+BASIS_ARRAYS = ("mean", "components", "explained_variance", "explained_variance_ratio")
+
+
+def fit_basis(
+    nii_paths,
+    n_components: int,
+    batch_size: int,
+    normalize_per_run: bool = True,
+    chunk_trs: int = 64,
+    voxel_index=None,
+    cache: dict = None
+) -> dict:
+    """
+    Fits one PCA basis by streaming TR blocks of every run in `nii_paths`
+    through IncrementalPCA (from the decoded-NIfTI cache when `cache` is
+    set). A trailing remainder smaller than the number of components is
+    left out of the fit.
+    """
+    if cache:
+        nifti_cache = NiftiCache(**cache)
+        streams = [
+            nifti_cache.load(p, normalize_per_run, voxel_index)[0]
+            for p in nii_paths
+        ]
+    else:
+        streams = [
+            NiftiBlockStream(p, normalize_per_run, chunk_trs, voxel_index)
+            for p in nii_paths
+        ]
+    total_trs = sum(s.shape[0] for s in streams)
+    n_voxels = streams[0].shape[1]
+    n_components = min(n_components, total_trs, n_voxels)
+    safe_batch = max(batch_size, n_components)
+
+    pca = IncrementalPCA(n_components=n_components)
+    buf, buf_rows = [], 0
+
+    for stream in tqdm(streams, desc="Fitting shared basis", leave=False):
+        for block in iter_batches(stream, chunk_trs):
+            buf.append(block)
+            buf_rows += len(block)
+            if buf_rows >= safe_batch:
+                pca.partial_fit(np.concatenate(buf))
+                buf, buf_rows = [], 0
+
+    if buf_rows >= n_components:
+        pca.partial_fit(np.concatenate(buf))
+    elif buf_rows:
+        print(f"Basis fit: dropped {buf_rows} trailing TRs (< {n_components} components)")
+
+    return {
+        "mean": pca.mean_.astype(np.float32),
+        "components": pca.components_.astype(np.float32),
+        "explained_variance": pca.explained_variance_.astype(np.float32),
+        "explained_variance_ratio": pca.explained_variance_ratio_.astype(np.float32),
+        "meta": {
+            "n_components": int(n_components),
+            "n_voxels": int(n_voxels),
+            "n_samples": int(pca.n_samples_seen_),
+            "runs": [os.path.basename(p) for p in nii_paths],
+            "normalize_per_run": normalize_per_run,
+        },
+    }
+
+
+def save_basis(basis_dir: str, basis: dict):
+    # one .npy per array so projections can memory-map the components
+    tmp_dir = basis_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    for name in BASIS_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), basis[name])
+    with open(os.path.join(tmp_dir, "basis_meta.json"), "w") as f:
+        json.dump(basis["meta"], f, indent=2)
+
+    shutil.rmtree(basis_dir, ignore_errors=True)
+    os.replace(tmp_dir, basis_dir)
+
+
+def basis_key(nii_paths, n_components: int, normalize_per_run: bool,
+              use_mni: bool, voxel_index=None) -> str:
+    """
+    Short hash of everything a fitted basis depends on: the fitted runs
+    (segment/run names), the requested number of components, per-run
+    normalization, the space and the voxel index.
+    """
+    runs = sorted(os.path.join(os.path.basename(os.path.dirname(p)), os.path.basename(p))
+                  for p in nii_paths)
+    mask = None
+    if voxel_index is not None:
+        mask = hashlib.sha256(np.asarray(voxel_index, dtype=np.int64).tobytes()).hexdigest()
+    inputs = {
+        "runs": runs,
+        "n_components": int(n_components),
+        "normalize_per_run": bool(normalize_per_run),
+        "use_mni": bool(use_mni),
+        "voxel_index": mask,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def basis_exists(basis_dir: str, key: str = None) -> bool:
+    """True if a basis is saved in `basis_dir` (and, given `key`, fitted on those inputs)."""
+    meta_path = os.path.join(basis_dir, "basis_meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    if key is None:
+        return True
+    with open(meta_path) as f:
+        return json.load(f).get("key") == key
+
+
+def load_basis(basis_dir: str) -> dict:
+    # keyed by the meta file's mtime, so a refitted basis is never served stale
+    meta_path = os.path.join(basis_dir, "basis_meta.json")
+    return _load_basis(basis_dir, os.stat(meta_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=2)
+def _load_basis(basis_dir: str, _mtime_ns: int) -> dict:
+    basis = {
+        name: np.load(os.path.join(basis_dir, f"{name}.npy"), mmap_mode="r")
+        for name in BASIS_ARRAYS
+    }
+    with open(os.path.join(basis_dir, "basis_meta.json")) as f:
+        basis["meta"] = json.load(f)
+    return basis
+
+
+def project(voxels, basis: dict, batch_size: int):
+    """
+    Projects (TR, voxels) data onto a fitted basis. Returns scores and the
+    fraction of this run's variance captured by the basis.
+    """
+    mean = np.asarray(basis["mean"])
+    C = np.asarray(basis["components"])
+
+    Z = np.zeros((voxels.shape[0], C.shape[0]), dtype=np.float32)
+    captured, total = 0.0, 0.0
+
+    i = 0
+    for batch in iter_batches(voxels, batch_size):
+        Xc = batch - mean
+        Zb = Xc @ C.T
+        Z[i:i + len(batch)] = Zb
+        captured += float(np.sum(Zb.astype(np.float64) ** 2))
+        total += float(np.sum(Xc.astype(np.float64) ** 2))
+        i += len(batch)
+
+    return torch.from_numpy(Z), captured / max(total, 1e-12)
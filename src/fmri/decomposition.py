@@ -0,0 +1,142 @@
+import numpy as np
+from tqdm import tqdm
+from sklearn.decomposition import IncrementalPCA
+from sklearn.utils.extmath import randomized_svd
+
+
+def iter_batches(voxels, batch_size: int):
+    """
+    Yields (TR_batch, voxels) blocks from either an in-memory array or a
+    block stream exposing `iter_blocks` (e.g. NiftiBlockStream).
+    """
+    if hasattr(voxels, "iter_blocks"):
+        yield from voxels.iter_blocks(batch_size)
+        return
+
+    for i in range(0, voxels.shape[0], batch_size):
+        yield voxels[i:i + batch_size]
+
+
+def as_array(voxels, batch_size: int = 64) -> np.ndarray:
+    """
+    Materializes a block stream into one preallocated float32 (TR, voxels)
+    array; arrays are returned unchanged.
+    """
+    if not hasattr(voxels, "iter_blocks"):
+        return voxels
+
+    X = np.empty(voxels.shape, dtype=np.float32)
+    i = 0
+    for block in voxels.iter_blocks(batch_size):
+        X[i:i + len(block)] = block
+        i += len(block)
+    return X
+
+
+def _component_signs(Vt):
+    # sign convention of IncrementalPCA (svd_flip, u_based_decision=False):
+    # the largest-magnitude voxel of each component is positive
+    idx = np.argmax(np.abs(Vt), axis=1)
+    return np.sign(Vt[np.arange(Vt.shape[0]), idx])
+
+
+def ipca_scores(voxels, n_components: int, batch_size: int):
+    safe_batch = max(batch_size, n_components)
+    n_tr = voxels.shape[0]
+    n_batches = -(-n_tr // safe_batch)
+    pca = IncrementalPCA(n_components=n_components)
+
+    for batch in tqdm(
+        iter_batches(voxels, safe_batch),
+        total=n_batches,
+        desc="Fitting PCA",
+        leave=False
+    ):
+        pca.partial_fit(batch)
+
+    Z = np.zeros((n_tr, n_components), dtype=np.float32)
+
+    i = 0
+    for batch in tqdm(
+        iter_batches(voxels, safe_batch),
+        total=n_batches,
+        desc="Transforming",
+        leave=False
+    ):
+        Z[i:i + len(batch)] = pca.transform(batch)
+        i += len(batch)
+
+    return Z, float(np.sum(pca.explained_variance_ratio_))
+
+
+def randomized_scores(
+    voxels,
+    n_components: int,
+    batch_size: int,
+    n_oversamples: int = 10,
+    n_iter: int = 4,
+    random_state: int = 0
+):
+    X = as_array(voxels, batch_size)
+    Xc = X - X.mean(0, dtype=np.float64).astype(np.float32)
+
+    U, S, Vt = randomized_svd(
+        Xc,
+        n_components,
+        n_oversamples=n_oversamples,
+        n_iter=n_iter,
+        random_state=random_state
+    )
+    U = U * _component_signs(Vt)
+
+    total_var = float(np.einsum("ij,ij->", Xc, Xc, dtype=np.float64))
+    explained_var = float(np.sum(S.astype(np.float64) ** 2) / max(total_var, 1e-12))
+
+    return (U * S).astype(np.float32), explained_var
+
+
+def gram_scores(
+    voxels,
+    n_components: int,
+    batch_size: int,
+    voxel_chunk: int = 16384
+):
+    # TR x TR Gram matrix of the centered data, accumulated over voxel
+    # columns; eigenvectors scaled by sqrt(eigenvalue) are the PCA scores.
+    X = as_array(voxels, batch_size)
+    n_tr, n_vox = X.shape
+    G = np.zeros((n_tr, n_tr), dtype=np.float64)
+
+    for j in range(0, n_vox, voxel_chunk):
+        Xj = X[:, j:j + voxel_chunk].astype(np.float64)
+        Xj -= Xj.mean(0)
+        G += Xj @ Xj.T
+
+    evals, evecs = np.linalg.eigh(G)
+    order = np.argsort(evals)[::-1]
+    evals = np.clip(evals[order], 0.0, None)
+    evecs = evecs[:, order[:n_components]]
+
+    # components are Xc^T evecs (up to scale): second pass over voxel
+    # columns for the largest-magnitude loading of each, as in ipca
+    best = np.zeros(evecs.shape[1])
+    for j in range(0, n_vox, voxel_chunk):
+        Xj = X[:, j:j + voxel_chunk].astype(np.float64)
+        Xj -= Xj.mean(0)
+        Vj = Xj.T @ evecs
+        idx = np.argmax(np.abs(Vj), axis=0)
+        vals = Vj[idx, np.arange(Vj.shape[1])]
+        best = np.where(np.abs(vals) > np.abs(best), vals, best)
+    evecs = evecs * np.sign(best)
+
+    Z = evecs * np.sqrt(evals[:n_components])
+    explained_var = float(evals[:n_components].sum() / max(evals.sum(), 1e-12))
+
+    return Z.astype(np.float32), explained_var
+
+
+DECOMPOSERS = {
+    "ipca": ipca_scores,
+    "randomized": randomized_scores,
+    "gram": gram_scores,
+}
@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+import nibabel as nib
+import numpy as np
+
+from src.io.nifti_loader import NiftiBlockStream
+from src.utils.disk_cache import file_sha256
+
+
+def mask_index_from_nifti(mask_path: str) -> np.ndarray:
+    """
+    Flat (C-order) indices of non-zero voxels in a 3D mask NIfTI.
+    """
+    mask = np.asarray(nib.load(mask_path).dataobj)
+    return np.flatnonzero(mask.reshape(-1) > 0)
+
+
+def derive_mask_index(
+    nifti_path: str,
+    intensity_frac: float = 0.2,
+    min_std: float = 1e-6,
+    chunk_trs: int = 64
+) -> np.ndarray:
+    """
+    Derives a brain mask from a reference 4D run: keeps voxels whose mean
+    intensity exceeds `intensity_frac` of the brightest voxel and whose
+    temporal std exceeds `min_std`.
+    """
+    stream = NiftiBlockStream(nifti_path, normalize_per_run=False, chunk_trs=chunk_trs)
+    mean, std = stream.voxel_stats()
+
+    keep = (mean > intensity_frac * mean.max()) & (std > min_std)
+    return np.flatnonzero(keep)
+
+
+def mask_key(
+    cache_dir: str,
+    mask_path: str = None,
+    reference_nifti: str = None,
+    intensity_frac: float = 0.2,
+    min_std: float = 1e-6
+) -> str:
+    """
+    Short hash of everything the voxel index depends on: the mask file
+    contents, or the reference run contents plus the thresholds. File
+    hashes are memoized under `cache_dir`, so a large reference run is
+    read only once.
+    """
+    memo_dir = os.path.join(cache_dir, "hash_memo")
+    if mask_path:
+        inputs = {"mask": file_sha256(mask_path, memo_dir)}
+    elif reference_nifti:
+        inputs = {
+            "reference": file_sha256(reference_nifti, memo_dir),
+            "intensity_frac": float(intensity_frac),
+            "min_std": float(min_std),
+        }
+    else:
+        raise ValueError("Either mask_path or reference_nifti is required")
+
+    blob = json.dumps(inputs, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def get_mask_index(
+    cache_dir: str,
+    subject: str,
+    space: str,
+    mask_path: str = None,
+    reference_nifti: str = None,
+    intensity_frac: float = 0.2,
+    min_std: float = 1e-6
+) -> np.ndarray:
+    """
+    Returns the flat in-mask voxel index for (subject, space), building it
+    once from `mask_path` (or from `reference_nifti` thresholds) and caching
+    it on disk for later runs. The cache file is keyed by mask_key, so a
+    different mask, reference run or threshold builds a new index.
+    """
+    key = mask_key(cache_dir, mask_path, reference_nifti, intensity_frac, min_std)
+    cache_path = os.path.join(cache_dir, f"{subject}_{space}_mask_index_{key}.npy")
+    if os.path.exists(cache_path):
+        return np.load(cache_path)
+
+    if mask_path:
+        index = mask_index_from_nifti(mask_path)
+    else:
+        index = derive_mask_index(reference_nifti, intensity_frac, min_std)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, index.astype(np.int64))
+    os.replace(tmp_path, cache_path)
+
+    return index
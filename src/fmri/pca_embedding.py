@@ -1,41 +1,35 @@
 import torch
-import numpy as np
-from tqdm import tqdm
-from sklearn.decomposition import IncrementalPCA
+
+from src.fmri.decomposition import DECOMPOSERS
 
 
 def compute_embeddings(
-    voxels: np.ndarray,
+    voxels,
     n_components: int,
-    batch_size: int
+    batch_size: int,
+    method: str = "ipca",
+    **method_kwargs
 ):
-    max_components = min(n_components, voxels.shape[0])
+    if method not in DECOMPOSERS:
+        raise ValueError(
+            f"Unknown decomposition method '{method}' "
+            f"(choose from {sorted(DECOMPOSERS)})"
+        )
+
+    n_tr = voxels.shape[0]
+    max_components = min(n_components, n_tr)
 
     if max_components < n_components:
         print(
             f"Reducing PCA components {n_components} → {max_components} "
-            f"(limited by TR={voxels.shape[0]})"
+            f"(limited by TR={n_tr})"
         )
 
-    safe_batch = max(batch_size, max_components)
-    pca = IncrementalPCA(n_components=max_components)
-
-    for i in tqdm(
-        range(0, len(voxels), safe_batch),
-        desc="Fitting PCA",
-        leave=False
-    ):
-        pca.partial_fit(voxels[i:i + safe_batch])
-
-    Z = np.zeros((len(voxels), max_components), dtype=np.float32)
-
-    for i in tqdm(
-        range(0, len(voxels), safe_batch),
-        desc="Transforming",
-        leave=False
-    ):
-        Z[i:i + safe_batch] = pca.transform(voxels[i:i + safe_batch])
-
-    explained_var = float(np.sum(pca.explained_variance_ratio_))
+    Z, explained_var = DECOMPOSERS[method](
+        voxels,
+        max_components,
+        batch_size,
+        **method_kwargs
+    )
 
-    return torch.from_numpy(Z), explained_var
\ No newline at end of file
+    return torch.from_numpy(Z), explained_var
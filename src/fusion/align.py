@@ -1,22 +1,27 @@
 import torch
-import numpy as np
+from src.utils.temporal import interval_means, resample_overlap, nearest_center
 
-def align_w2v2_to_TR(meta, W, win_sec, hop_sec, TR=2.0):
+def align_w2v2_to_TR(meta, W, win_sec, hop_sec, TR=2.0, mode="auto"):
+    """
+    mode="auto": mean over whole windows per TR for integer TR/hop ratios,
+    nearest window center otherwise. mode="overlap": overlap-weighted
+    average of every window intersecting the TR, for any ratio.
+    """
     T = int(meta["n_tr"])
     N, D = W.shape
-    out = torch.zeros(T, D)
+
+    if mode == "overlap":
+        return resample_overlap(W, hop_sec, win_sec, T, TR)
 
     r = TR / hop_sec
     r_int = int(round(r))
 
     if abs(r - r_int) < 1e-6 and r_int >= 1:
-        for t in range(T):
-            s, e = t * r_int, (t + 1) * r_int
-            if s >= N: break
-            out[t] = W[s:min(e, N)].mean(dim=0)
+        out = torch.zeros(T, D)
+        starts = torch.arange(T) * r_int
+        starts = starts[starts < N]
+        ends = torch.clamp(starts + r_int, max=N)
+        out[:len(starts)] = interval_means(W, starts, ends)
         return out
 
-    centers = (torch.arange(N) * hop_sec + win_sec / 2).numpy()
-    tr_centers = (np.arange(T) * TR + TR / 2)
-    idx = np.clip(np.searchsorted(centers, tr_centers), 0, N - 1)
-    return W[idx]
\ No newline at end of file
+    return nearest_center(W, hop_sec, win_sec, T, TR)
\ No newline at end of file
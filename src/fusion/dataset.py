@@ -1,16 +1,52 @@
 import os, json, torch, pandas as pd
 from torch.utils.data import Dataset
 from src.fusion.align import align_w2v2_to_TR
+from src.io.embedding_names import embedding_name
+from src.io.packed_store import open_store, split_key
+from src.io.manifest import load_manifest
 
 class FMRI_AudioFusionDataset(Dataset):
-    def __init__(self, csv_path, fmri_root, audio_root, seq_len=16):
+    """
+    fmri_root / audio_root may each be an embedding directory tree or a
+    packed store (see src/io/packed_store.py). Trees with a manifest.jsonl
+    are read through it (paths and meta included) instead of being listed;
+    without records of the modality they are listed as before, and audio
+    embeddings missing from the manifest are read from disk.
+    """
+    def __init__(self, csv_path, fmri_root, audio_root, seq_len=16, fmri_dim=245,
+                 align_mode="auto", audio_win_sec=2.0, audio_layers=None):
         self.df = pd.read_csv(csv_path)
         self.fmri_root = fmri_root
         self.audio_root = audio_root
         self.seq_len = seq_len
+        self.fmri_dim = fmri_dim
+        self.align_mode = align_mode
+        self.audio_win_sec = audio_win_sec
+        self.audio_layers = audio_layers
         self.video_ids = set(self.df["video_id"].astype(str))
         self.samples = []
 
+        self.fmri_store = open_store(fmri_root)
+        self.audio_store = open_store(audio_root)
+        self.audio_manifest = {} if self.audio_store is not None \
+            else load_manifest(audio_root, "audio")
+
+        if self.fmri_store is not None:
+            for key in self.fmri_store.keys():
+                subj, seg = split_key(key)
+                if seg in self.video_ids:
+                    self.samples.append((subj, seg, key, None))
+            return
+
+        # manifest samples carry the meta dict in place of the _meta.json path
+        fmri_manifest = load_manifest(fmri_root, "fmri")
+        if fmri_manifest:
+            for key, e in sorted(fmri_manifest.items()):
+                subj, seg = split_key(key)
+                if seg in self.video_ids and "n_tr" in e["meta"]:
+                    self.samples.append((subj, seg, e["path"], e["meta"]))
+            return
+
         for subj in sorted(os.listdir(fmri_root)):
             subj_dir = os.path.join(fmri_root, subj)
             if not os.path.isdir(subj_dir):
@@ -32,22 +68,43 @@ class FMRI_AudioFusionDataset(Dataset):
 
     def __getitem__(self, idx):
         subj, seg, fmri_path, meta_path = self.samples[idx]
-        fmri_meta = json.load(open(meta_path))
-        fmri = torch.load(fmri_path).float()
+        if self.fmri_store is not None:
+            fmri_meta = self.fmri_store.entry_meta(fmri_path)
+            fmri = self.fmri_store.get(fmri_path)
+        else:
+            fmri_meta = meta_path if isinstance(meta_path, dict) else json.load(open(meta_path))
+            fmri = torch.load(fmri_path).float()
 
-        # fix dim to 245
-        fmri = fmri[:, :245] if fmri.shape[1] >= 245 else \
-               torch.cat([fmri, torch.zeros(fmri.shape[0], 245 - fmri.shape[1])], 1)
+        # fix dim to fmri_dim (a no-op with a shared basis of that size)
+        d = self.fmri_dim
+        fmri = fmri[:, :d] if fmri.shape[1] >= d else \
+               torch.cat([fmri, torch.zeros(fmri.shape[0], d - fmri.shape[1])], 1)
 
-        audio_path = os.path.join(self.audio_root, f"{seg}_full_w2v2_2s.pt")
-        audio_meta = json.load(open(audio_path.replace(".pt", "_meta.json")))
-        W = torch.load(audio_path).float()
+        audio_name = embedding_name(f"{seg}_full", self.audio_win_sec, self.audio_layers)
+        audio_key = os.path.splitext(audio_name)[0]
+        if self.audio_store is not None:
+            audio_meta = self.audio_store.entry_meta(audio_key)
+            W = self.audio_store.get(audio_key)
+        elif audio_key in self.audio_manifest:
+            entry = self.audio_manifest[audio_key]
+            audio_meta = entry["meta"]
+            W = torch.load(entry["path"]).float()
+        else:
+            audio_path = os.path.join(self.audio_root, audio_name)
+            audio_meta = json.load(open(audio_path.replace(".pt", "_meta.json")))
+            W = torch.load(audio_path).float()
 
+        # older embeddings predate the window fields (non-overlapping windows)
+        win_sec = audio_meta.get("secs_per_window", self.audio_win_sec)
         audio_aligned = align_w2v2_to_TR(
             fmri_meta, W,
-            audio_meta["secs_per_window"],
-            audio_meta["hop_sec"]
+            win_sec,
+            audio_meta.get("hop_sec", win_sec),
+            mode=self.align_mode
         )
 
-        T = min(self.seq_len, fmri.shape[0], audio_aligned.shape[0])
+        # seq_len=None keeps the full aligned sequence (for SequenceWindows)
+        T = min(fmri.shape[0], audio_aligned.shape[0])
+        if self.seq_len:
+            T = min(T, self.seq_len)
         return fmri[:T], audio_aligned[:T], subj, seg
\ No newline at end of file
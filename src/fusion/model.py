@@ -7,8 +7,9 @@ class CrossAttentionFusion(nn.Module):
         self.audio_proj = nn.Linear(d_a, d_model)
         self.attn = nn.MultiheadAttention(d_model, n_heads, batch_first=True)
 
-    def forward(self, fmri, audio):
+    def forward(self, fmri, audio, key_padding_mask=None):
+        # key_padding_mask: (B, T_audio) bool, True at padded audio steps
         Q = self.fmri_proj(fmri)
         K = self.audio_proj(audio)
-        fused, attn = self.attn(Q, K, K)
+        fused, attn = self.attn(Q, K, K, key_padding_mask=key_padding_mask)
         return fused, attn
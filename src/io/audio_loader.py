@@ -1,3 +1,4 @@
+import math
 import torchaudio
 import torch
 
@@ -5,4 +6,38 @@ def load_audio_16k(path: str) -> torch.Tensor:
     wav, sr = torchaudio.load(path)
     if sr != 16000:
         wav = torchaudio.functional.resample(wav, sr, 16000)
-    return wav.mean(dim=0)  # mono (T,)
\ No newline at end of file
+    return wav.mean(dim=0)  # mono (T,)
+
+
+def iter_audio_16k(path: str, block_sec: float = 60.0, margin: int = 4096):
+    """
+    Reads audio incrementally and yields contiguous mono 16 kHz blocks.
+    Blocks are resampled with `margin` source samples of context on both
+    sides, aligned to the resampling period, so the concatenated output
+    matches resampling the whole file at once.
+    """
+    _, sr = torchaudio.load(path, frame_offset=0, num_frames=1)
+    unit = sr // math.gcd(sr, 16000)  # source samples per whole output period
+    block = max(unit, int(block_sec * sr) // unit * unit)
+    margin = 0 if sr == 16000 else -(-margin // unit) * unit
+    ahead = max(margin, 1)  # at least one sample to detect the last block
+
+    a = 0
+    while True:
+        left = min(margin, a)
+        x, _ = torchaudio.load(path, frame_offset=a - left, num_frames=left + block + ahead)
+        x = x.mean(dim=0)
+        got = x.numel() - left
+        if got <= 0:
+            break
+
+        if sr != 16000:
+            x = torchaudio.functional.resample(x, sr, 16000)
+        start = left * 16000 // sr
+
+        if got > block:
+            yield x[start:start + block * 16000 // sr]
+            a += block
+        else:
+            yield x[start:]
+            break
\ No newline at end of file
@@ -0,0 +1,7 @@
+def embedding_name(base, win_sec, layers=None):
+    """
+    File name of pooled wav2vec2 embeddings; layer selections other than
+    the full stack get a tag, e.g. `{base}_w2v2_L6-8_2s.pt`.
+    """
+    tag = "_L" + "-".join(str(i) for i in layers) if layers else ""
+    return f"{base}_w2v2{tag}_{int(win_sec)}s.pt"
@@ -0,0 +1,182 @@
+import os
+import json
+import glob
+import torch
+
+from src.utils.disk_cache import file_sha256
+from src.io.packed_store import entry_key
+
+MANIFEST_FILE = "manifest.jsonl"
+
+
+def manifest_path(root: str) -> str:
+    return os.path.join(root, MANIFEST_FILE)
+
+
+def has_manifest(root) -> bool:
+    return bool(root) and os.path.exists(manifest_path(root))
+
+
+def _entry(root, modality, key, path, shape=None, checksum=True, meta=None):
+    if shape is None:
+        shape = tuple(torch.load(path, map_location="cpu").shape)
+    rel = os.path.relpath(path, root) if path.startswith(root + os.sep) else path
+    return {
+        "modality": modality,
+        "key": key,
+        "path": rel,
+        "shape": [int(n) for n in shape],
+        "sha256": file_sha256(path) if checksum else None,
+        "meta": meta or {},
+    }
+
+
+def record_output(root: str, modality: str, key: str, path: str,
+                  shape=None, checksum: bool = True, meta: dict = None):
+    """
+    Appends one output file to the manifest at `root`. Paths under `root`
+    are stored relative to it; later records for a key win. Each record is
+    a single line written with one append, so a single writer per manifest
+    never leaves partial entries behind.
+    """
+    os.makedirs(root, exist_ok=True)
+    path = os.path.abspath(path)
+    entry = _entry(os.path.abspath(root), modality, key, path, shape, checksum, meta)
+    with open(manifest_path(root), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def _read_records(root: str) -> dict:
+    # latest record per (modality, key), paths as stored
+    records = {}
+    with open(manifest_path(root)) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                e = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line of an interrupted writer
+            records[(e["modality"], e["key"])] = e
+    return records
+
+
+def load_manifest(root: str, modality: str) -> dict:
+    """
+    {key: entry} of `modality`, with entry["path"] resolved to an absolute
+    path. One file read, no directory listing; {} without a manifest.
+    Readers fall back to scanning the tree when this is empty.
+    """
+    entries = {}
+    if not has_manifest(root):
+        return entries
+    for (m, key), e in _read_records(root).items():
+        if m == modality:
+            entries[key] = dict(e, path=os.path.join(root, e["path"]))
+    return entries
+
+
+# ============================================================
+# Tree scanners (layouts written by the pipeline stages)
+# ============================================================
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _scan_fmri(root):
+    # {subject}/{segment}/{segment}_avg_embeddings.pt (+ {segment}_meta.json)
+    for path in sorted(glob.glob(os.path.join(root, "*", "*", "*_avg_embeddings.pt"))):
+        seg_dir = os.path.dirname(path)
+        seg, subj = os.path.basename(seg_dir), os.path.basename(os.path.dirname(seg_dir))
+        if os.path.basename(path) == f"{seg}_avg_embeddings.pt":
+            yield entry_key(subj, seg), path, _read_json(os.path.join(seg_dir, f"{seg}_meta.json"))
+
+
+def _scan_fusion(root):
+    # {subject}/{segment}_fused_embeddings.pt (+ _fused_meta.json)
+    for path in sorted(glob.glob(os.path.join(root, "*", "*_fused_embeddings.pt"))):
+        subj = os.path.basename(os.path.dirname(path))
+        seg = os.path.basename(path).replace("_fused_embeddings.pt", "")
+        yield entry_key(subj, seg), path, _read_json(path.replace("_embeddings.pt", "_meta.json"))
+
+
+def _scan_audio(root):
+    # {name}_w2v2[_L..]_{win}s.pt (+ _meta.json), keyed by file stem
+    for path in sorted(glob.glob(os.path.join(root, "*_w2v2*.pt"))):
+        yield (
+            os.path.splitext(os.path.basename(path))[0],
+            path,
+            _read_json(path.replace(".pt", "_meta.json"))
+        )
+
+
+def _scan_motion(root):
+    # {segment}_motion.pt (+ _motion_meta.json)
+    for path in sorted(glob.glob(os.path.join(root, "*_motion.pt"))):
+        yield (
+            os.path.basename(path).replace("_motion.pt", ""),
+            path,
+            _read_json(path.replace("_motion.pt", "_motion_meta.json"))
+        )
+
+
+SCANNERS = {
+    "fmri": _scan_fmri,
+    "fusion": _scan_fusion,
+    "audio": _scan_audio,
+    "motion": _scan_motion,
+}
+
+
+def rebuild_manifest(root: str, modality: str, checksum: bool = True) -> int:
+    """
+    Regenerates the `modality` records of the manifest at `root` from a
+    scan of the tree (records of other modalities are kept) and replaces
+    the file atomically. Returns the number of scanned entries.
+    """
+    if modality not in SCANNERS:
+        raise ValueError(f"Unknown modality '{modality}'. Available: {list(SCANNERS)}")
+
+    abs_root = os.path.abspath(root)
+    kept = []
+    if has_manifest(root):
+        kept = [json.dumps(e) for (m, _), e in _read_records(root).items() if m != modality]
+
+    lines = [
+        json.dumps(_entry(abs_root, modality, key, os.path.abspath(path),
+                          checksum=checksum, meta=meta))
+        for key, path, meta in SCANNERS[modality](abs_root)
+    ]
+
+    tmp_path = f"{manifest_path(root)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("".join(line + "\n" for line in kept + lines))
+    os.replace(tmp_path, manifest_path(root))
+    return len(lines)
+
+
+def sync_manifest(root: str, modality: str, checksum: bool = True) -> int:
+    """
+    Appends records for `modality` outputs found in the tree at `root` but
+    missing from its manifest: everything written before the manifest was
+    enabled (or while it was off), including outputs later runs skip as
+    already done. Writers call this once on start-up so the manifest
+    stays complete. Returns the number of records added.
+    """
+    if modality not in SCANNERS:
+        raise ValueError(f"Unknown modality '{modality}'. Available: {list(SCANNERS)}")
+    if not os.path.isdir(root):
+        return 0
+
+    recorded = load_manifest(root, modality)
+    added = 0
+    for key, path, meta in SCANNERS[modality](os.path.abspath(root)):
+        if key not in recorded:
+            record_output(root, modality, key, path, checksum=checksum, meta=meta)
+            added += 1
+    return added
@@ -0,0 +1,68 @@
+import os
+import hashlib
+import numpy as np
+
+from src.io.nifti_loader import NiftiBlockStream
+from src.utils.disk_cache import (
+    file_sha256, touch, evict_lru, open_npy_for_write, commit_npy
+)
+
+CACHE_VERSION = 1
+
+
+class NiftiCache:
+    """
+    On-disk cache of decoded, normalized float32 (TR, voxels) matrices.
+    Entries are uncompressed .npy files keyed by the source file's content
+    hash plus the normalization options, read back as memory maps, and
+    evicted least-recently-used once the cache exceeds `max_size_gb`.
+    """
+
+    def __init__(self, cache_dir: str, max_size_gb: float = None, chunk_trs: int = 64):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_gb * 2**30) if max_size_gb else None
+        self.chunk_trs = chunk_trs
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, nifti_path: str, normalize_per_run: bool, voxel_index=None) -> str:
+        parts = [
+            f"v{CACHE_VERSION}",
+            file_sha256(nifti_path, os.path.join(self.cache_dir, "hashes")),
+            f"norm={int(bool(normalize_per_run))}",
+        ]
+        if voxel_index is not None:
+            idx = np.ascontiguousarray(voxel_index, dtype=np.int64)
+            parts.append("mask=" + hashlib.sha1(idx.tobytes()).hexdigest())
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def load(self, nifti_path: str, normalize_per_run: bool = True, voxel_index=None):
+        path = os.path.join(
+            self.cache_dir,
+            self.key(nifti_path, normalize_per_run, voxel_index) + ".npy"
+        )
+
+        if os.path.exists(path):
+            touch(path)
+        else:
+            self._fill(path, nifti_path, normalize_per_run, voxel_index)
+            evict_lru(self.cache_dir, self.max_bytes, "*.npy", keep=[path])
+
+        voxels = np.load(path, mmap_mode="r")
+        return voxels, voxels.shape[0]
+
+    def _fill(self, path, nifti_path, normalize_per_run, voxel_index):
+        # one decode pass of raw blocks, then an in-place column-wise z-score
+        stream = NiftiBlockStream(nifti_path, False, self.chunk_trs, voxel_index)
+        mm, tmp_path = open_npy_for_write(path, stream.shape)
+
+        i = 0
+        for block in stream.iter_blocks():
+            mm[i:i + len(block)] = block
+            i += len(block)
+
+        if normalize_per_run:
+            for j in range(0, mm.shape[1], 16384):
+                X = mm[:, j:j + 16384].astype(np.float64)
+                mm[:, j:j + 16384] = (X - X.mean(0)) / (X.std(0) + 1e-6)
+
+        commit_npy(mm, tmp_path, path)
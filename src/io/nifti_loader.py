@@ -3,15 +3,99 @@ import numpy as np
 
 def load_fmri_from_nifti(
     nifti_path: str,
-    normalize_per_run: bool = True
+    normalize_per_run: bool = True,
+    voxel_index: np.ndarray = None
 ):
     img = nib.load(nifti_path)
     data = img.get_fdata()
 
     T = data.shape[-1]
-    voxels = data.reshape(-1, T).T  # (TR, voxels)
+    voxels = data.reshape(-1, T)
+    if voxel_index is not None:
+        voxels = voxels[voxel_index]
+    voxels = voxels.T  # (TR, voxels)
 
     if normalize_per_run:
         voxels = (voxels - voxels.mean(0)) / (voxels.std(0) + 1e-6)
 
-    return voxels.astype(np.float32), T
\ No newline at end of file
+    return voxels.astype(np.float32), T
+
+
+class NiftiBlockStream:
+    """
+    Streams a 4D NIfTI run as float32 (TR_chunk, voxels) blocks through
+    nibabel's array proxy, so the float64 volume is never materialized.
+    Per-voxel mean/std are computed in one streaming pass over TR chunks.
+    An optional flat `voxel_index` (see src/fmri/mask.py) keeps only
+    in-mask voxels.
+    """
+
+    def __init__(
+        self,
+        nifti_path: str,
+        normalize_per_run: bool = True,
+        chunk_trs: int = 64,
+        voxel_index: np.ndarray = None
+    ):
+        self.img = nib.load(nifti_path, mmap=True, keep_file_open=True)
+        self.n_tr = int(self.img.shape[-1])
+        self.grid_voxels = int(np.prod(self.img.shape[:-1]))
+        self.voxel_index = voxel_index
+
+        if voxel_index is not None and len(voxel_index) and voxel_index.max() >= self.grid_voxels:
+            raise ValueError(
+                f"Voxel index does not fit {nifti_path} "
+                f"(grid has {self.grid_voxels} voxels)"
+            )
+
+        self.n_voxels = self.grid_voxels if voxel_index is None else len(voxel_index)
+        self.shape = (self.n_tr, self.n_voxels)
+        self.chunk_trs = max(1, int(chunk_trs))
+        self.normalize_per_run = normalize_per_run
+
+        self.mean, self.std = None, None
+        if normalize_per_run:
+            self.mean, self.std = self.voxel_stats()
+
+    def _read(self, t0, t1):
+        block = np.asarray(self.img.dataobj[..., t0:t1]).reshape(-1, t1 - t0)
+        if self.voxel_index is not None:
+            block = block[self.voxel_index]
+        return block.T  # (TR_chunk, voxels)
+
+    def voxel_stats(self):
+        # Chan et al. pairwise merge of per-chunk mean / M2
+        n = 0
+        mean = np.zeros(self.n_voxels, dtype=np.float64)
+        m2 = np.zeros(self.n_voxels, dtype=np.float64)
+
+        for t0 in range(0, self.n_tr, self.chunk_trs):
+            x = self._read(t0, min(t0 + self.chunk_trs, self.n_tr)).astype(np.float64)
+            n_b = x.shape[0]
+            mean_b = x.mean(0)
+            m2_b = ((x - mean_b) ** 2).sum(0)
+
+            delta = mean_b - mean
+            total = n + n_b
+            mean += delta * (n_b / total)
+            m2 += m2_b + delta ** 2 * (n * n_b / total)
+            n = total
+
+        return mean, np.sqrt(m2 / max(n, 1))
+
+    def iter_blocks(self, chunk_trs: int = None):
+        step = max(1, int(chunk_trs or self.chunk_trs))
+
+        for t0 in range(0, self.n_tr, step):
+            block = self._read(t0, min(t0 + step, self.n_tr))
+
+            if self.normalize_per_run:
+                block = (block - self.mean) / (self.std + 1e-6)
+
+            yield np.ascontiguousarray(block, dtype=np.float32)
+
+    def __iter__(self):
+        return self.iter_blocks()
+
+    def __len__(self):
+        return self.n_tr
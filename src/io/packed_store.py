@@ -0,0 +1,169 @@
+import os
+import json
+import numpy as np
+import torch
+
+STORE_VERSION = 1
+INDEX_FILE = "index.json"
+DATA_FILE = "data.f32"
+
+
+def entry_key(subject, segment) -> str:
+    # subject-independent modalities (audio, motion) are keyed by segment only
+    return f"{subject}/{segment}" if subject else str(segment)
+
+
+def split_key(key: str):
+    subject, _, segment = key.rpartition("/")
+    return subject or None, segment
+
+
+def is_store(path) -> bool:
+    return bool(path) and os.path.exists(os.path.join(path, INDEX_FILE))
+
+
+def _read_index(store_dir):
+    with open(os.path.join(store_dir, INDEX_FILE)) as f:
+        index = json.load(f)
+    if index["version"] != STORE_VERSION:
+        raise ValueError(f"Unsupported store version {index['version']} in {store_dir}")
+    return index
+
+
+class PackedStoreWriter:
+    """
+    Appends (T, D) float32 arrays to one contiguous data file and keeps an
+    index of key -> (offset, shape, meta). Data is flushed before the index
+    is atomically replaced, so readers only ever see complete entries.
+    Assumes a single writing process per store. Re-putting a key points
+    the index at the new rows; the old rows stay as dead bytes.
+    """
+
+    def __init__(self, store_dir: str, meta: dict = None, flush_every: int = 64):
+        self.store_dir = store_dir
+        self.flush_every = flush_every
+        os.makedirs(store_dir, exist_ok=True)
+
+        if is_store(store_dir):
+            self.index = _read_index(store_dir)
+            self.index["meta"].update(meta or {})
+        else:
+            self.index = {"version": STORE_VERSION, "dtype": "float32",
+                          "meta": dict(meta or {}), "entries": {}}
+
+        # drop rows a crashed writer appended but never indexed
+        end = max(
+            (e["offset"] + int(np.prod(e["shape"])) for e in self.index["entries"].values()),
+            default=0
+        )
+        data_path = os.path.join(store_dir, DATA_FILE)
+        with open(data_path, "ab") as f:
+            f.truncate(end * 4)
+        self._f = open(data_path, "ab")
+        self._offset = end
+        self._pending = 0
+
+    def __contains__(self, key):
+        return key in self.index["entries"]
+
+    def entry_meta(self, key: str) -> dict:
+        return self.index["entries"][key]["meta"]
+
+    def put(self, key: str, array, meta: dict = None):
+        if isinstance(array, torch.Tensor):
+            array = array.detach().cpu().numpy()
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        if array.ndim == 1:
+            array = array[:, None]
+
+        self._f.write(array.tobytes())
+        self.index["entries"][key] = {
+            "offset": self._offset,
+            "shape": list(array.shape),
+            "meta": meta or {},
+        }
+        self._offset += array.size
+
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+        index_path = os.path.join(self.store_dir, INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path)
+        self._pending = 0
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PackedStore:
+    """
+    Read side of a packed store. `get` returns a tensor that views the
+    memory-mapped data file (copy-on-write, nothing is read until touched).
+    The map is opened lazily, so the store can be handed to DataLoader
+    workers.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.index = _read_index(store_dir)
+        self.entries = self.index["entries"]
+        self.meta = self.index["meta"]
+        self._data = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def keys(self):
+        return sorted(self.entries)
+
+    def entry_meta(self, key: str) -> dict:
+        return self.entries[key]["meta"]
+
+    def shape(self, key: str):
+        return tuple(self.entries[key]["shape"])
+
+    def get(self, key: str) -> torch.Tensor:
+        if self._data is None:
+            end = max(
+                (e["offset"] + int(np.prod(e["shape"])) for e in self.entries.values()),
+                default=0
+            )
+            self._data = np.memmap(
+                os.path.join(self.store_dir, DATA_FILE),
+                dtype=np.float32, mode="c", shape=(end,)
+            ) if end else np.zeros(0, dtype=np.float32)
+
+        e = self.entries[key]
+        n = int(np.prod(e["shape"]))
+        return torch.from_numpy(
+            self._data[e["offset"]:e["offset"] + n].reshape(e["shape"])
+        )
+
+
+def open_store(path):
+    """PackedStore at `path`, or None if `path` is a plain directory."""
+    return PackedStore(path) if is_store(path) else None
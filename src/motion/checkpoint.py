@@ -0,0 +1,83 @@
+import os
+import glob
+import random
+import numpy as np
+import torch
+
+
+def _rng_state():
+    return {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+        "cuda": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+    }
+
+
+def _set_rng_state(state):
+    # the setters only take CPU ByteTensors, whatever map_location was used
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"].cpu())
+    if state["cuda"] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all([s.cpu() for s in state["cuda"]])
+
+
+class CheckpointManager:
+    """
+    Training checkpoints `{prefix}_epoch{NNNN}.pt` in `ckpt_dir` holding
+    model, optimizer and scheduler state, RNG states and the epoch. Each
+    file is written to a temp file and renamed into place, so a crash
+    never leaves a truncated checkpoint; only the newest `keep_last` are
+    kept.
+    """
+
+    def __init__(self, ckpt_dir: str, prefix: str, keep_last: int = 3):
+        self.ckpt_dir = ckpt_dir
+        self.prefix = prefix
+        self.keep_last = keep_last
+        os.makedirs(ckpt_dir, exist_ok=True)
+
+    def paths(self):
+        return sorted(glob.glob(os.path.join(self.ckpt_dir, f"{self.prefix}_epoch*.pt")))
+
+    def latest(self):
+        paths = self.paths()
+        return paths[-1] if paths else None
+
+    def save(self, epoch: int, model, optimizer, scheduler=None, extra: dict = None):
+        path = os.path.join(self.ckpt_dir, f"{self.prefix}_epoch{epoch:04d}.pt")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        torch.save({
+            "epoch": epoch,
+            "model": model.state_dict(),
+            "optimizer": optimizer.state_dict(),
+            "scheduler": scheduler.state_dict() if scheduler is not None else None,
+            "rng": _rng_state(),
+            "extra": extra or {},
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+        for old in self.paths()[:-self.keep_last] if self.keep_last else []:
+            os.remove(old)
+        return path
+
+    def load(self, model, optimizer=None, scheduler=None, path: str = None,
+             map_location="cpu") -> int:
+        """
+        Restores the latest (or given) checkpoint and returns its epoch;
+        0 if there is none.
+        """
+        path = path or self.latest()
+        if path is None:
+            return 0
+
+        state = torch.load(path, map_location=map_location, weights_only=False)
+        model.load_state_dict(state["model"])
+        if optimizer is not None:
+            optimizer.load_state_dict(state["optimizer"])
+        if scheduler is not None and state["scheduler"] is not None:
+            scheduler.load_state_dict(state["scheduler"])
+        _set_rng_state(state["rng"])
+        return state["epoch"]
@@ -1,10 +1,49 @@
 import os, torch
 from torch.utils.data import Dataset
+from src.io.packed_store import open_store, split_key
+from src.io.manifest import load_manifest
 
 class FMRI_MotionDataset(Dataset):
+    """
+    fmri_root / motion_dir may each be an embedding directory or a packed
+    store (see src/io/packed_store.py); samples then hold store keys.
+    Directories with a manifest.jsonl are read through it instead of
+    being listed; a manifest without records of the modality (e.g. one
+    holding other outputs only) falls back to the listing, and motion
+    targets missing from it are looked up on disk.
+    """
     def __init__(self, fmri_root, motion_dir, seq_len):
         self.samples = []
         self.seq_len = seq_len
+        self.fmri_store = open_store(fmri_root)
+        self.motion_store = open_store(motion_dir)
+
+        motion_manifest = {} if self.motion_store is not None \
+            else load_manifest(motion_dir, "motion")
+
+        for subj, seg, fmri_path in self._fmri_entries(fmri_root):
+            if self.motion_store is not None:
+                motion_path = seg if seg in self.motion_store else None
+            elif seg in motion_manifest:
+                motion_path = motion_manifest[seg]["path"]
+            else:
+                motion_path = os.path.join(motion_dir, f"{seg}_motion.pt")
+                motion_path = motion_path if os.path.exists(motion_path) else None
+
+            if motion_path is not None:
+                self.samples.append((fmri_path, motion_path))
+
+    def _fmri_entries(self, fmri_root):
+        if self.fmri_store is not None:
+            for key in self.fmri_store.keys():
+                yield (*split_key(key), key)
+            return
+
+        fmri_manifest = load_manifest(fmri_root, "fmri")
+        if fmri_manifest:
+            for key, e in sorted(fmri_manifest.items()):
+                yield (*split_key(key), e["path"])
+            return
 
         for subj in sorted(os.listdir(fmri_root)):
             subj_dir = os.path.join(fmri_root, subj)
@@ -14,17 +53,20 @@ class FMRI_MotionDataset(Dataset):
             for seg in os.listdir(subj_dir):
                 seg_dir = os.path.join(subj_dir, seg)
                 fmri_path = os.path.join(seg_dir, f"{seg}_avg_embeddings.pt")
-                motion_path = os.path.join(motion_dir, f"{seg}_motion.pt")
-
-                if os.path.exists(fmri_path) and os.path.exists(motion_path):
-                    self.samples.append((fmri_path, motion_path))
+                if os.path.exists(fmri_path):
+                    yield subj, seg, fmri_path
 
     def __len__(self):
         return len(self.samples)
 
     def __getitem__(self, idx):
         fmri_path, motion_path = self.samples[idx]
-        fmri = torch.load(fmri_path).float()
-        motion = torch.load(motion_path).float()
-        T = min(self.seq_len, fmri.shape[0], motion.shape[0])
+        fmri = self.fmri_store.get(fmri_path) if self.fmri_store is not None \
+            else torch.load(fmri_path).float()
+        motion = self.motion_store.get(motion_path) if self.motion_store is not None \
+            else torch.load(motion_path).float()
+        # seq_len=None keeps the full aligned sequence (for SequenceWindows)
+        T = min(fmri.shape[0], motion.shape[0])
+        if self.seq_len:
+            T = min(T, self.seq_len)
         return fmri[:T], motion[:T]
@@ -1,10 +1,49 @@
 import os, torch
 from torch.utils.data import Dataset
+from src.io.packed_store import open_store, split_key
+from src.io.manifest import load_manifest
 
 class Fusion_MotionDataset(Dataset):
+    """
+    fusion_root / motion_dir may each be an embedding directory or a packed
+    store (see src/io/packed_store.py); samples then hold store keys.
+    Directories with a manifest.jsonl are read through it instead of
+    being listed; a manifest without records of the modality (e.g. one
+    holding other outputs only) falls back to the listing, and motion
+    targets missing from it are looked up on disk.
+    """
     def __init__(self, fusion_root, motion_dir, seq_len):
         self.samples = []
         self.seq_len = seq_len
+        self.fusion_store = open_store(fusion_root)
+        self.motion_store = open_store(motion_dir)
+
+        motion_manifest = {} if self.motion_store is not None \
+            else load_manifest(motion_dir, "motion")
+
+        for seg, fusion_path in self._fusion_entries(fusion_root):
+            if self.motion_store is not None:
+                motion_path = seg if seg in self.motion_store else None
+            elif seg in motion_manifest:
+                motion_path = motion_manifest[seg]["path"]
+            else:
+                motion_path = os.path.join(motion_dir, f"{seg}_motion.pt")
+                motion_path = motion_path if os.path.exists(motion_path) else None
+
+            if motion_path is not None:
+                self.samples.append((fusion_path, motion_path))
+
+    def _fusion_entries(self, fusion_root):
+        if self.fusion_store is not None:
+            for key in self.fusion_store.keys():
+                yield split_key(key)[1], key
+            return
+
+        fusion_manifest = load_manifest(fusion_root, "fusion")
+        if fusion_manifest:
+            for key, e in sorted(fusion_manifest.items()):
+                yield split_key(key)[1], e["path"]
+            return
 
         for subj in sorted(os.listdir(fusion_root)):
             subj_dir = os.path.join(fusion_root, subj)
@@ -16,18 +55,19 @@ class Fusion_MotionDataset(Dataset):
                     continue
 
                 seg = f.replace("_fused_embeddings.pt", "")
-                fusion_path = os.path.join(subj_dir, f)
-                motion_path = os.path.join(motion_dir, f"{seg}_motion.pt")
-
-                if os.path.exists(motion_path):
-                    self.samples.append((fusion_path, motion_path))
+                yield seg, os.path.join(subj_dir, f)
 
     def __len__(self):
         return len(self.samples)
 
     def __getitem__(self, idx):
         fusion_path, motion_path = self.samples[idx]
-        fusion = torch.load(fusion_path).float()
-        motion = torch.load(motion_path).float()
-        T = min(self.seq_len, fusion.shape[0], motion.shape[0])
+        fusion = self.fusion_store.get(fusion_path) if self.fusion_store is not None \
+            else torch.load(fusion_path).float()
+        motion = self.motion_store.get(motion_path) if self.motion_store is not None \
+            else torch.load(motion_path).float()
+        # seq_len=None keeps the full aligned sequence (for SequenceWindows)
+        T = min(fusion.shape[0], motion.shape[0])
+        if self.seq_len:
+            T = min(T, self.seq_len)
         return fusion[:T], motion[:T]
@@ -0,0 +1,162 @@
+import os
+import glob
+import json
+import cv2
+import numpy as np
+
+from src.io.packed_store import open_store
+from src.io.manifest import load_manifest
+
+# ============================================================
+# Per-frame-pair motion descriptors
+#
+# Each descriptor maps a batch of flow fields, given as dx, dy, magnitude
+# and angle arrays of shape (N, H, W), to an (N, k) block of features.
+# A schema (list of {"name", params..., "dim", "labels"}) fixes the order
+# of the blocks and is stored with the targets.
+# ============================================================
+def _legacy(dx, dy, mag, ang, **_):
+    # original [mean magnitude, mean angle] (angle mean does not wrap)
+    return np.stack([mag.mean(axis=(1, 2)), ang.mean(axis=(1, 2))], axis=1)
+
+
+def _magnitude(dx, dy, mag, ang, **_):
+    return mag.mean(axis=(1, 2))[:, None]
+
+
+def _direction(dx, dy, mag, ang, weighted=True, **_):
+    # circular mean direction as (cos, sin) of the mean resultant plus its
+    # length R in [0, 1]; weighting by magnitude discounts static pixels
+    w = mag if weighted else np.ones_like(mag)
+    c = (np.cos(ang) * w).sum(axis=(1, 2))
+    s = (np.sin(ang) * w).sum(axis=(1, 2))
+    total = np.maximum(w.sum(axis=(1, 2)), 1e-12)
+    mu = np.arctan2(s, c)
+    R = np.hypot(c, s) / total
+    return np.stack([np.cos(mu), np.sin(mu), R], axis=1)
+
+
+def _mag_hist(dx, dy, mag, ang, edges=(0.25, 0.5, 1.0, 2.0, 4.0), **_):
+    # fraction of pixels per magnitude bin: (<e0, [e0, e1), ..., >=e_last)
+    n_bins = len(edges) + 1
+    N = mag.shape[0]
+    idx = np.searchsorted(np.asarray(edges, dtype=mag.dtype), mag.reshape(N, -1), side="right")
+    idx += (np.arange(N) * n_bins)[:, None]
+    counts = np.bincount(idx.ravel(), minlength=N * n_bins).reshape(N, n_bins)
+    return counts / mag[0].size
+
+
+def _grid(dx, dy, mag, ang, rows=4, cols=4, **_):
+    # mean (dx, dy) over a rows x cols grid of cells (edges trimmed to fit)
+    N, H, W = dx.shape
+    h, w = H // rows, W // cols
+    flow = np.stack([dx[:, :rows * h, :cols * w], dy[:, :rows * h, :cols * w]], axis=-1)
+    return flow.reshape(N, rows, h, cols, w, 2).mean(axis=(2, 4)).reshape(N, -1)
+
+
+def _labels(name, params):
+    if name == "legacy":
+        return ["mag_mean", "ang_mean"]
+    if name == "magnitude":
+        return ["mag_mean"]
+    if name == "direction":
+        return ["dir_cos", "dir_sin", "dir_R"]
+    if name == "mag_hist":
+        bounds = [None, *params["edges"], None]
+        return [f"mag_hist_{lo}_{hi}" for lo, hi in zip(bounds[:-1], bounds[1:])]
+    if name == "grid":
+        return [
+            f"grid_r{r}_c{c}_{axis}"
+            for r in range(params["rows"]) for c in range(params["cols"]) for axis in ("dx", "dy")
+        ]
+
+
+DESCRIPTORS = {
+    "legacy": (_legacy, {}),
+    "magnitude": (_magnitude, {}),
+    "direction": (_direction, {"weighted": True}),
+    "mag_hist": (_mag_hist, {"edges": [0.25, 0.5, 1.0, 2.0, 4.0]}),
+    "grid": (_grid, {"rows": 4, "cols": 4}),
+}
+
+
+def build_schema(specs):
+    """
+    Resolves descriptor specs (names or {"name": ..., **params} dicts, e.g.
+    from configs/motion_targets.yaml) into a schema with defaults filled in,
+    per-block dims and feature labels.
+    """
+    schema = []
+    for spec in specs:
+        spec = {"name": spec} if isinstance(spec, str) else dict(spec)
+        name = spec.pop("name")
+        if name not in DESCRIPTORS:
+            raise ValueError(f"Unknown motion descriptor '{name}'. Available: {list(DESCRIPTORS)}")
+
+        params = {**DESCRIPTORS[name][1], **spec}
+        labels = _labels(name, params)
+        schema.append({"name": name, **params, "dim": len(labels), "labels": labels})
+    return schema
+
+
+LEGACY_SCHEMA = build_schema(["legacy"])
+
+
+def schema_dim(schema) -> int:
+    return sum(block["dim"] for block in schema)
+
+
+def compute_descriptors(flows, schema):
+    """
+    (N, H, W, 2) flow fields -> (N, schema_dim) float32 features, computed
+    in one vectorized pass over the batch. Magnitude / angle come from one
+    cv2.cartToPolar call over all fields.
+    """
+    N, H, W, _ = flows.shape
+    dx = np.ascontiguousarray(flows[..., 0]).reshape(N * H, W)
+    dy = np.ascontiguousarray(flows[..., 1]).reshape(N * H, W)
+    mag, ang = cv2.cartToPolar(dx, dy)
+
+    dx, dy = dx.reshape(N, H, W), dy.reshape(N, H, W)
+    mag, ang = mag.reshape(N, H, W), ang.reshape(N, H, W)
+
+    blocks = []
+    for block in schema:
+        params = {k: v for k, v in block.items() if k not in ("name", "dim", "labels")}
+        blocks.append(DESCRIPTORS[block["name"]][0](dx, dy, mag, ang, **params))
+    return np.concatenate(blocks, axis=1).astype(np.float32)
+
+
+# ============================================================
+# Schema lookup for stored targets
+# ============================================================
+def meta_path(target_path: str) -> str:
+    return target_path.replace("_motion.pt", "_motion_meta.json")
+
+
+def load_motion_schema(motion_dir):
+    """
+    Descriptor schema of the targets in `motion_dir` (packed store,
+    manifest or directory of *_motion.pt + _motion_meta.json). Targets
+    written before schemas existed have none: LEGACY_SCHEMA is returned.
+    """
+    store = open_store(motion_dir)
+    manifest = load_manifest(motion_dir, "motion") if store is None else {}
+    if store is not None:
+        metas = (store.entry_meta(k) for k in store.keys())
+    elif manifest:
+        metas = (e["meta"] for e in manifest.values())
+    else:
+        metas = (
+            json.load(open(p))
+            for p in sorted(glob.glob(os.path.join(motion_dir, "*_motion_meta.json")))
+        )
+
+    for meta in metas:
+        if meta and "descriptors" in meta:
+            return meta["descriptors"]
+    return LEGACY_SCHEMA
+
+
+def motion_dim(motion_dir) -> int:
+    return schema_dim(load_motion_schema(motion_dir))
@@ -1,10 +1,60 @@
 import os
 import torch
 import pandas as pd
-from scipy.stats import pearsonr
-from tqdm import tqdm
 
-from src.motion.metrics import mse, corr
+from src.motion.metrics import batch_mse, batch_corr
+from src.utils.sequence_windows import pad_collate
+
+
+def discover_subjects(*roots):
+    """Sorted union of the subject directories found under the given roots."""
+    subjects = set()
+    for root in roots:
+        if os.path.isdir(root):
+            subjects.update(
+                d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))
+            )
+    return sorted(subjects)
+
+
+def _predict(model, seqs, batch_size=None, fallback=None):
+    """
+    One padded, masked forward pass over variable-length (T_i, D) sequences
+    (in chunks of `batch_size` if given); returns the (N, T_max, d_motion)
+    predictions. `fallback` is applied to the inputs when the model rejects
+    them (dimension mismatch).
+    """
+    preds = []
+    step = batch_size or len(seqs)
+    for i in range(0, len(seqs), step):
+        x, mask = pad_collate([(s,) for s in seqs[i:i + step]])
+        mask = mask.to(x.device)
+        with torch.no_grad():
+            try:
+                pred = model(x, src_key_padding_mask=mask)
+            except RuntimeError:
+                if fallback is None:
+                    raise
+                pred = model(fallback(x), src_key_padding_mask=mask)
+        preds.extend(pred)
+    return pad_collate([(p,) for p in preds])[0]
+
+
+def _subject_mean(preds, lengths, seg_ids, n_segs, n_steps):
+    """
+    Averages per-(subject, segment) predictions over subjects, step by step,
+    into (n_segs, n_steps, D); also returns the (n_segs, n_steps) count of
+    subjects that cover each step.
+    """
+    T = min(preds.shape[1], n_steps)
+    preds = preds[:, :T]
+    covered = (torch.arange(T, device=preds.device).unsqueeze(0) < lengths.unsqueeze(1))
+
+    total = preds.new_zeros(n_segs, n_steps, preds.shape[-1])
+    count = preds.new_zeros(n_segs, n_steps)
+    total[:, :T].index_add_(0, seg_ids, preds * covered.unsqueeze(-1))
+    count[:, :T].index_add_(0, seg_ids, covered.to(preds.dtype))
+    return total / count.clamp(min=1).unsqueeze(-1), count
 
 
 def evaluate_motion_decoders(
@@ -18,66 +68,100 @@ def evaluate_motion_decoders(
     fps,
     target_d_fmri,
     target_d_fusion,
-    device
+    device,
+    subjects=None,
+    batch_size=None
 ):
+    """
+    Scores both decoders on every test segment with a motion target. All
+    available (subject, segment) inputs of a model are padded into one
+    masked batch and decoded in a single forward pass (or `batch_size`
+    chunks); predictions are averaged over subjects per segment and MSE /
+    Pearson r (motion channel 0) are computed for all segments at once
+    against the TR-averaged targets. `subjects` defaults to every subject
+    directory under fmri_root / fusion_root.
+    """
     frames_per_tr = int(tr_sec * fps)
-    results = []
+    if subjects is None:
+        subjects = discover_subjects(fmri_root, fusion_root)
 
     proj_fmri = torch.nn.Linear(target_d_fmri, target_d_fusion).to(device)
     proj_fmri.eval()
 
-    for seg in tqdm(test_segments, desc="Evaluating test segments"):
+    # ---- targets: TR-averaged motion per segment ----
+    segs, gts = [], []
+    for seg in test_segments:
         motion_path = os.path.join(motion_dir, f"{seg}_motion.pt")
         if not os.path.exists(motion_path):
             continue
 
-        motion_gt = torch.load(motion_path).float().to(device)
+        motion_gt = torch.load(motion_path).float()
         n_trs = motion_gt.shape[0] // frames_per_tr
         if n_trs == 0:
             continue
 
-        motion_gt = motion_gt[: n_trs * frames_per_tr] \
-                        .reshape(n_trs, frames_per_tr, -1) \
-                        .mean(dim=1)
+        segs.append(seg)
+        gts.append(
+            motion_gt[: n_trs * frames_per_tr]
+            .reshape(n_trs, frames_per_tr, -1)
+            .mean(dim=1)
+        )
 
-        fmri_preds, fusion_preds = [], []
+    if not segs:
+        return pd.DataFrame()
 
-        for subj in ["subject1", "subject2", "subject3"]:
-            # ---- fMRI ----
+    gt, gt_pad = pad_collate([(g,) for g in gts])
+    gt = gt.to(device)
+    gt_valid = ~gt_pad.to(device)
+
+    # ---- inputs: every available (subject, segment) sequence ----
+    fmri_seqs, fmri_ids, fusion_seqs, fusion_ids = [], [], [], []
+    for i, seg in enumerate(segs):
+        for subj in subjects:
             fmri_path = os.path.join(fmri_root, subj, seg, f"{seg}_avg_embeddings.pt")
             if os.path.exists(fmri_path):
-                fmri = torch.load(fmri_path).float().to(device)
-                fmri = fmri[:, :target_d_fmri]
-
-                with torch.no_grad():
-                    try:
-                        pred = fmri_model(fmri.unsqueeze(0)).squeeze(0)
-                    except RuntimeError:
-                        pred = fmri_model(proj_fmri(fmri).unsqueeze(0)).squeeze(0)
+                fmri_seqs.append(torch.load(fmri_path).float()[:, :target_d_fmri])
+                fmri_ids.append(i)
 
-                fmri_preds.append(pred[: motion_gt.shape[0]])
-
-            # ---- Fusion ----
             fusion_path = os.path.join(fusion_root, subj, f"{seg}_fused_embeddings.pt")
             if os.path.exists(fusion_path):
-                fusion = torch.load(fusion_path).float().to(device)
-                fusion = fusion[:, :target_d_fusion]
-
-                with torch.no_grad():
-                    pred = fusion_model(fusion.unsqueeze(0)).squeeze(0)
-
-                fusion_preds.append(pred[: motion_gt.shape[0]])
-
-        if fmri_preds and fusion_preds:
-            fmri_pred = torch.stack(fmri_preds).mean(0)
-            fusion_pred = torch.stack(fusion_preds).mean(0)
-
-            results.append({
-                "segment": seg,
-                "mse_fmri": mse(fmri_pred, motion_gt),
-                "mse_fusion": mse(fusion_pred, motion_gt),
-                "corr_fmri": corr(fmri_pred[:, 0], motion_gt[:, 0]),
-                "corr_fusion": corr(fusion_pred[:, 0], motion_gt[:, 0]),
-            })
-
-    return pd.DataFrame(results)
+                fusion_seqs.append(torch.load(fusion_path).float()[:, :target_d_fusion])
+                fusion_ids.append(i)
+
+    if not fmri_seqs or not fusion_seqs:
+        return pd.DataFrame()
+
+    n_segs, n_steps = len(segs), gt.shape[1]
+    means = {}
+    for name, model, seqs, ids, fallback in (
+        ("fmri", fmri_model, fmri_seqs, fmri_ids, proj_fmri),
+        ("fusion", fusion_model, fusion_seqs, fusion_ids, None),
+    ):
+        preds = _predict(model, [s.to(device) for s in seqs], batch_size, fallback)
+        lengths = torch.tensor([s.shape[0] for s in seqs], device=device)
+        means[name] = _subject_mean(
+            preds, lengths, torch.tensor(ids, device=device), n_segs, n_steps
+        )
+
+    fmri_pred, fmri_count = means["fmri"]
+    fusion_pred, fusion_count = means["fusion"]
+
+    # segments decoded by both models, scored over the steps both cover
+    keep = (fmri_count.sum(1) > 0) & (fusion_count.sum(1) > 0)
+    valid = gt_valid & (fmri_count > 0) & (fusion_count > 0)
+
+    mse_fmri = batch_mse(fmri_pred, gt, valid)
+    mse_fusion = batch_mse(fusion_pred, gt, valid)
+    corr_fmri = batch_corr(fmri_pred[..., 0], gt[..., 0], valid)
+    corr_fusion = batch_corr(fusion_pred[..., 0], gt[..., 0], valid)
+
+    return pd.DataFrame([
+        {
+            "segment": segs[i],
+            "mse_fmri": mse_fmri[i].item(),
+            "mse_fusion": mse_fusion[i].item(),
+            "corr_fmri": corr_fmri[i].item(),
+            "corr_fusion": corr_fusion[i].item(),
+        }
+        for i in range(n_segs) if keep[i]
+    ])
@@ -6,3 +6,24 @@ def mse(pred, gt):
 
 def corr(pred, gt):
     return pearsonr(pred.cpu().numpy(), gt.cpu().numpy())[0]
+
+def masked_mse_loss(pred, gt, mask=None):
+    """Differentiable MSE over non-padded steps (mask: (B, T), True = padded)."""
+    if mask is None:
+        return torch.mean((pred - gt) ** 2)
+    valid = (~mask).unsqueeze(-1).to(pred.dtype)
+    return (((pred - gt) ** 2) * valid).sum() / (valid.sum() * pred.shape[-1]).clamp(min=1)
+
+def batch_mse(pred, gt, valid):
+    """Per-sequence MSE over valid steps: pred/gt (B, T, D), valid (B, T) bool -> (B,)."""
+    v = valid.unsqueeze(-1).to(pred.dtype)
+    return (((pred - gt) ** 2) * v).sum(dim=(1, 2)) / (v.sum(dim=(1, 2)) * pred.shape[-1]).clamp(min=1)
+
+def batch_corr(pred, gt, valid):
+    """Per-sequence Pearson r over valid steps: pred/gt (B, T), valid (B, T) bool -> (B,)."""
+    pred, gt = pred.double(), gt.double()
+    v = valid.to(pred.dtype)
+    n = v.sum(dim=1).clamp(min=1)
+    dp = (pred - (pred * v).sum(dim=1, keepdim=True) / n.unsqueeze(1)) * v
+    dg = (gt - (gt * v).sum(dim=1, keepdim=True) / n.unsqueeze(1)) * v
+    return (dp * dg).sum(dim=1) / ((dp ** 2).sum(dim=1) * (dg ** 2).sum(dim=1)).sqrt()
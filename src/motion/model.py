@@ -13,8 +13,9 @@ class MotionDecoder(nn.Module):
         self.encoder = nn.TransformerEncoder(layer, n_layers)
         self.fc = nn.Linear(d_model, d_motion)
 
-    def forward(self, x):
-        return self.fc(self.encoder(x))
+    def forward(self, x, src_key_padding_mask=None):
+        # src_key_padding_mask: (B, T) bool, True at padded steps
+        return self.fc(self.encoder(x, src_key_padding_mask=src_key_padding_mask))
 
 
 def load_encoder_only(model, checkpoint_path):
@@ -1,31 +1,55 @@
 import cv2
+import numpy as np
 import torch
 
-def compute_optical_flow(video_path, resize=(64, 64)):
-    cap = cv2.VideoCapture(video_path)
-    ret, prev = cap.read()
-    if not ret:
+from src.video.io import probe_video, read_video
+from src.motion.descriptors import LEGACY_SCHEMA, compute_descriptors, schema_dim
+
+
+# Farneback settings; part of the motion-target cache key
+FARNEBACK_PARAMS = {
+    "pyr_scale": 0.5, "levels": 3, "winsize": 15,
+    "iterations": 3, "poly_n": 5, "poly_sigma": 1.2, "flags": 0,
+}
+
+
+def count_frames(video_path) -> int:
+    return probe_video(video_path)["n_frames"]
+
+
+def compute_optical_flow(video_path, resize=(64, 64), start=0, stop=None,
+                         descriptors=None, batch_pairs=256):
+    """
+    Per-frame-pair Farneback flow descriptors: row i describes frames
+    (i, i + 1). Frames are decoded by ffmpeg directly at `resize` =
+    (width, height) in gray. Flow fields are collected into batches of
+    `batch_pairs` and reduced to the features of the `descriptors` schema
+    (src/motion/descriptors.py; default: legacy [mean magnitude, mean
+    angle]) in one vectorized pass per batch. `start` / `stop` restrict the
+    output to rows [start, stop), decoding frames start..stop only, so
+    ranges of one video can be computed independently and concatenated.
+    """
+    schema = descriptors or LEGACY_SCHEMA
+    frames = read_video(
+        video_path,
+        size=resize,
+        gray=True,
+        start=start,
+        max_frames=None if stop is None else stop - start + 1
+    )
+    if len(frames) == 0:
         return None
 
-    prev = cv2.resize(prev, resize)
-    prev_gray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
-    feats = []
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame = cv2.resize(frame, resize)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        flow = cv2.calcOpticalFlowFarneback(
-            prev_gray, gray, None,
-            pyr_scale=0.5, levels=3, winsize=15,
-            iterations=3, poly_n=5, poly_sigma=1.2, flags=0
-        )
-        mag, ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
-        feats.append([mag.mean(), ang.mean()])
-        prev_gray = gray
-
-    cap.release()
-    return torch.tensor(feats, dtype=torch.float32)
+    n_pairs = len(frames) - 1
+    feats = np.empty((n_pairs, schema_dim(schema)), dtype=np.float32)
+    flows = np.empty((min(batch_pairs, n_pairs), *frames.shape[1:], 2), dtype=np.float32)
+
+    for b0 in range(0, n_pairs, batch_pairs):
+        n = min(batch_pairs, n_pairs - b0)
+        for j in range(n):
+            flows[j] = cv2.calcOpticalFlowFarneback(
+                frames[b0 + j], frames[b0 + j + 1], None, **FARNEBACK_PARAMS
+            )
+        feats[b0:b0 + n] = compute_descriptors(flows[:n], schema)
+
+    return torch.from_numpy(feats)
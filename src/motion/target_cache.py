@@ -0,0 +1,66 @@
+import os
+import json
+import hashlib
+import numpy as np
+import torch
+
+from src.motion.optical_flow import FARNEBACK_PARAMS
+from src.utils.disk_cache import (
+    file_sha256, touch, evict_lru, open_npy_for_write, commit_npy
+)
+
+# bump when frame decoding or flow post-processing changes results
+CACHE_VERSION = 1
+
+
+def target_key(video_hash: str, resize, descriptors) -> str:
+    """
+    Content address of a motion target: video content hash, Farneback
+    parameters, decode size and descriptor schema (labels excluded).
+    """
+    parts = {
+        "version": CACHE_VERSION,
+        "video": video_hash,
+        "flow": FARNEBACK_PARAMS,
+        "resize": [int(n) for n in resize],
+        "descriptors": [
+            {k: v for k, v in block.items() if k != "labels"} for block in descriptors
+        ],
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class MotionTargetCache:
+    """
+    On-disk cache of computed (rows, D) float32 motion targets as .npy
+    files named by `target_key`, so results are found again whatever the
+    video's path or the output layout, recomputed whenever the video,
+    flow parameters, resize or descriptors change, and evicted
+    least-recently-used once the cache exceeds `max_size_gb`.
+    """
+
+    def __init__(self, cache_dir: str, max_size_gb: float = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_gb * 2**30) if max_size_gb else None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, video_path: str, resize, descriptors) -> str:
+        video_hash = file_sha256(video_path, os.path.join(self.cache_dir, "hashes"))
+        return target_key(video_hash, resize, descriptors)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def get(self, key: str):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        touch(path)
+        return torch.from_numpy(np.load(path))
+
+    def put(self, key: str, flow):
+        path = self._path(key)
+        mm, tmp_path = open_npy_for_write(path, flow.shape)
+        mm[:] = flow.numpy() if isinstance(flow, torch.Tensor) else flow
+        commit_npy(mm, tmp_path, path)
+        evict_lru(self.cache_dir, self.max_bytes, "*.npy", keep=[path])
@@ -0,0 +1,121 @@
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import torch
+from tqdm import tqdm
+
+from src.motion.optical_flow import compute_optical_flow, count_frames
+
+
+def frame_ranges(n_frames: int, chunk_frames: int = None):
+    """
+    Splits the n_frames - 1 flow rows of a video into [start, stop) ranges
+    of `chunk_frames` rows; neighbouring ranges share their boundary frame.
+    The last range is open-ended (stop=None) so an underestimated frame
+    count never drops the tail.
+    """
+    n_rows = n_frames - 1
+    if not chunk_frames or n_rows <= chunk_frames:
+        return [(0, None)]
+    starts = list(range(0, n_rows, chunk_frames))
+    return [(s, s + chunk_frames) for s in starts[:-1]] + [(starts[-1], None)]
+
+
+def _init_worker():
+    # one process per core already; keep OpenCV from oversubscribing
+    import cv2
+    cv2.setNumThreads(1)
+
+
+def _flow_job(vid, part, path, start, stop, resize, descriptors):
+    try:
+        return vid, part, compute_optical_flow(path, resize, start, stop, descriptors), None
+    except Exception as e:
+        return vid, part, None, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+
+
+def _stitch(parts, ranges):
+    """
+    Concatenates the range outputs of one video. Only the tail may come
+    back short or empty (the frame count overestimated the video); a
+    short or missing range followed by rows would shift everything after
+    it, so it raises instead.
+    """
+    rows, ended = [], None
+    for p, (start, stop) in zip(parts, ranges):
+        n = 0 if p is None else p.shape[0]
+        if n and ended is not None:
+            raise RuntimeError(
+                f"frame range {ended} returned too few rows but later ranges have data"
+            )
+        if n:
+            rows.append(p)
+        if stop is None or n < stop - start:
+            ended = ended or (start, stop)
+    return torch.cat(rows) if rows else None
+
+
+def extract_motion_targets(videos: dict, on_done, resize=(64, 64),
+                           num_workers: int = 1, chunk_frames: int = None,
+                           descriptors=None):
+    """
+    Computes optical-flow motion targets for {video_id: path}. With
+    num_workers > 1, videos are spread across a process pool and videos
+    longer than `chunk_frames` are further split into frame ranges
+    (see frame_ranges) computed concurrently and stitched back in order,
+    giving the same rows as the serial path. `descriptors` is the per-row
+    feature schema (see src/motion/descriptors.py). `on_done(video_id, flow)` is
+    called in the parent as each video completes (flow is None when the
+    video could not be read). Returns {video_id: error} for failures,
+    including a range that came back short or empty before the tail.
+    """
+    resize = tuple(resize)
+    errors = {}
+
+    if num_workers <= 1:
+        for vid, path in tqdm(videos.items(), desc="Motion targets"):
+            vid, _, flow, err = _flow_job(vid, 0, path, 0, None, resize, descriptors)
+            if err:
+                errors[vid] = err
+                tqdm.write(f"   ❌ {vid}: {err.splitlines()[0]}")
+                continue
+            on_done(vid, flow)
+        return errors
+
+    remaining, parts = {}, {}
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker
+    ) as ex:
+        futures = []
+        for vid, path in videos.items():
+            ranges = frame_ranges(count_frames(path), chunk_frames)
+            remaining[vid] = len(ranges)
+            parts[vid] = ([None] * len(ranges), ranges)
+            for part, (start, stop) in enumerate(ranges):
+                futures.append(ex.submit(_flow_job, vid, part, path, start, stop, resize, descriptors))
+
+        with tqdm(total=len(futures), desc="Motion target ranges") as pbar:
+            for fut in as_completed(futures):
+                vid, part, flow, err = fut.result()
+                pbar.update(1)
+                if err:
+                    errors.setdefault(vid, err)
+                parts[vid][0][part] = flow
+                remaining[vid] -= 1
+
+                if remaining[vid] == 0:
+                    flow_parts, ranges = parts.pop(vid)
+                    if vid not in errors:
+                        try:
+                            flow = _stitch(flow_parts, ranges)
+                        except RuntimeError as e:
+                            errors[vid] = f"{type(e).__name__}: {e}"
+                    if vid in errors:
+                        tqdm.write(f"   ❌ {vid}: {errors[vid].splitlines()[0]}")
+                    else:
+                        on_done(vid, flow)
+
+    return errors
@@ -0,0 +1,164 @@
+import time
+import contextlib
+import torch
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler
+
+from src.motion.metrics import masked_mse_loss
+from src.utils.sample_cache import CachedDataset
+from src.utils.sequence_windows import SequenceWindows, pad_collate
+from src.utils.distributed import is_distributed, is_main_process, barrier, all_reduce_sum
+
+
+def build_dataset(dataset_cls, root: str, cfg: dict):
+    """
+    `dataset_cls(root, motion_dir, seq_len)` wrapped as configured: full
+    sequences + SequenceWindows when `windows` is enabled, optionally
+    preloaded through CachedDataset first.
+    """
+    windows = cfg["windows"]["enabled"]
+    ds = dataset_cls(
+        root,
+        cfg["paths"]["motion_dir"],
+        None if windows else cfg["training"]["seq_len"]
+    )
+
+    if cfg["cache"]["enabled"]:
+        ds = CachedDataset(
+            ds,
+            cfg["cache"]["max_mb"],
+            cfg["cache"]["pin_memory"],
+            cfg["cache"]["share_memory"]
+        )
+
+    if windows:
+        ds = SequenceWindows(
+            ds,
+            cfg["training"]["seq_len"],
+            cfg["windows"]["mode"],
+            cfg["windows"]["stride"],
+            cfg["windows"]["per_segment"]
+        )
+    return ds
+
+
+def build_loader(ds, cfg: dict, device: str, sampler=None):
+    """
+    Shuffled, padded DataLoader over `ds`. Under torch.distributed a
+    DistributedSampler is used by default, so every rank sees its own
+    shard of training.batch_size samples per step.
+    """
+    tcfg = cfg["training"]
+    workers = tcfg["num_workers"]
+    if sampler is None and is_distributed():
+        sampler = DistributedSampler(ds, shuffle=True)
+    return DataLoader(
+        ds,
+        tcfg["batch_size"],
+        shuffle=sampler is None,
+        sampler=sampler,
+        collate_fn=pad_collate,
+        num_workers=workers,
+        prefetch_factor=tcfg["prefetch_factor"] if workers > 0 else None,
+        persistent_workers=workers > 0,
+        pin_memory=str(device).startswith("cuda"),
+    )
+
+
+def train_motion_decoder(model, loader, cfg: dict, device: str, checkpoints=None):
+    """
+    Masked-MSE training of a MotionDecoder over padded (x, y, mask)
+    batches. training.precision selects fp32 or bf16 autocast,
+    training.compile wraps the model in torch.compile, and gradients are
+    accumulated over training.grad_accum_steps batches per optimizer step
+    (lr_schedule: constant | cosine over all optimizer steps). Prints and
+    returns per-epoch loss, samples/s and mean step time.
+
+    With a CheckpointManager, training resumes from its latest checkpoint
+    (model, optimizer, scheduler, RNG, epoch) and a checkpoint is written
+    every checkpoint.every epochs and after the last one.
+
+    Under torch.distributed the model is wrapped in DistributedDataParallel
+    (gradients all-reduced on every optimizer step, not on accumulation
+    micro-batches); epoch statistics are summed over ranks and only rank 0
+    logs and writes checkpoints.
+    """
+    tcfg = cfg["training"]
+    accum = max(1, tcfg["grad_accum_steps"])
+    epochs = tcfg["epochs"]
+    device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+    use_bf16 = tcfg["precision"] == "bf16"
+
+    opt = torch.optim.AdamW(model.parameters(), lr=float(tcfg["lr"]))
+    sched = None
+    if tcfg["lr_schedule"] == "cosine":
+        total_steps = epochs * -(-len(loader) // accum)
+        sched = torch.optim.lr_scheduler.CosineAnnealingLR(opt, max(1, total_steps))
+
+    start_epoch = 0
+    if checkpoints is not None:
+        # loaded on CPU: load_state_dict moves model / optimizer state to
+        # their devices, and RNG states must stay CPU tensors
+        start_epoch = checkpoints.load(model, opt, sched)
+        if start_epoch:
+            if is_main_process():
+                print(f"⏩ Resuming from epoch {start_epoch}: {checkpoints.latest()}")
+
+    ddp_model = DistributedDataParallel(model) if is_distributed() else None
+    step_model = ddp_model if ddp_model is not None else model
+    step_model = torch.compile(step_model) if tcfg["compile"] else step_model
+
+    history = []
+    for ep in range(start_epoch, epochs):
+        if isinstance(loader.sampler, DistributedSampler):
+            loader.sampler.set_epoch(ep)
+        model.train()
+        opt.zero_grad()
+        loss_sum, n_samples, n_steps = 0.0, 0, 0
+        t0 = time.perf_counter()
+
+        for i, (x, y, mask) in enumerate(loader):
+            x = x.to(device, non_blocking=True)
+            y = y.to(device, non_blocking=True)
+            mask = mask.to(device, non_blocking=True)
+
+            do_step = (i + 1) % accum == 0 or i + 1 == len(loader)
+            # skip the gradient all-reduce on accumulation micro-batches
+            sync = contextlib.nullcontext() if do_step or ddp_model is None else ddp_model.no_sync()
+
+            with sync:
+                with torch.autocast(device_type=device_type, dtype=torch.bfloat16, enabled=use_bf16):
+                    pred = step_model(x, src_key_padding_mask=mask)
+                loss = masked_mse_loss(pred.float(), y, mask)
+                (loss / accum).backward()
+
+            if do_step:
+                opt.step()
+                opt.zero_grad()
+                n_steps += 1
+                if sched is not None:
+                    sched.step()
+
+            loss_sum += loss.item() * x.shape[0]
+            n_samples += x.shape[0]
+
+        elapsed = time.perf_counter() - t0
+        loss_sum, n_samples = all_reduce_sum([loss_sum, n_samples], device)
+        stats = {
+            "epoch": ep + 1,
+            "loss": loss_sum / max(n_samples, 1),
+            "samples_per_s": n_samples / elapsed,
+            "step_ms": 1e3 * elapsed / max(n_steps, 1),
+            "lr": opt.param_groups[0]["lr"],
+        }
+        history.append(stats)
+        if is_main_process():
+            print(f"Epoch {stats['epoch']} | Loss {stats['loss']:.6f} | "
+                  f"{stats['samples_per_s']:.1f} samples/s | step {stats['step_ms']:.1f} ms")
+
+        if checkpoints is not None and ((ep + 1) % cfg["checkpoint"]["every"] == 0 or ep + 1 == epochs):
+            if is_main_process():
+                checkpoints.save(ep + 1, model, opt, sched, extra={"loss": stats["loss"]})
+            barrier()
+
+    return history
@@ -0,0 +1,113 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.io.audio_loader import load_audio_16k
+from src.audio.wav2vec2_frames import extract_frames_batched
+from src.pipeline.audio_processor import (
+    embedding_paths, is_done, pool_embeddings, save_embeddings
+)
+
+
+def _writer(write_q, out_dir, cfg, errors, store):
+    while True:
+        item = write_q.get()
+        if item is None:
+            break
+        audio_path, W = item
+        try:
+            save_embeddings(audio_path, W, out_dir, cfg, store)
+        except Exception as e:
+            errors.append((audio_path, e))
+            print(f"❌ Failed to save {audio_path}: {e}")
+
+
+def run_audio_pipeline(
+    files,
+    out_dir,
+    processor,
+    model,
+    cfg,
+    device,
+    store=None
+):
+    """
+    Producer–consumer audio embedding pipeline: a thread pool decodes and
+    resamples upcoming file batches while the current batch is in the
+    model, and a writer thread persists embeddings and _meta.json files.
+    Prefetch and write queues are bounded so memory stays flat. With a
+    packed `store`, only the writer thread appends to it.
+    Returns a list of (audio_path, exception) for files that failed.
+    """
+    pcfg = cfg["pipeline"]
+    n = cfg["batching"]["files_per_batch"]
+
+    pending = []
+    for p in files:
+        if is_done(p, out_dir, cfg, store):
+            print(f"⏩ Skip {embedding_paths(p, out_dir, cfg)[0]}")
+        else:
+            pending.append(p)
+
+    groups = iter([pending[i:i + n] for i in range(0, len(pending), n)])
+
+    errors = []
+    write_q = queue.Queue(maxsize=pcfg["write_queue"])
+    writer = threading.Thread(
+        target=_writer, args=(write_q, out_dir, cfg, errors, store), daemon=True
+    )
+    writer.start()
+
+    # the writer always gets its sentinel and is joined, so batches already
+    # queued are written even if decoding or inference raises
+    try:
+        with ThreadPoolExecutor(max_workers=pcfg["decode_workers"]) as decode_pool:
+            in_flight = deque()
+
+            def submit_next():
+                group = next(groups, None)
+                if group:
+                    in_flight.append(
+                        [(p, decode_pool.submit(load_audio_16k, p)) for p in group]
+                    )
+
+            for _ in range(max(1, pcfg["prefetch_batches"])):
+                submit_next()
+
+            while in_flight:
+                batch = in_flight.popleft()
+                submit_next()
+
+                paths, wavs = [], []
+                for p, fut in batch:
+                    try:
+                        wavs.append(fut.result())
+                        paths.append(p)
+                    except Exception as e:
+                        errors.append((p, e))
+                        print(f"❌ Failed to decode {p}: {e}")
+
+                if not paths:
+                    continue
+
+                Hs = extract_frames_batched(
+                    wavs,
+                    processor,
+                    model,
+                    cfg["model"]["frame_hz"],
+                    cfg["chunking"]["chunk_sec"],
+                    cfg["chunking"]["overlap_sec"],
+                    device,
+                    cfg["batching"]["batch_size"],
+                    layers=cfg["model"]["layers"]
+                )
+                del wavs
+
+                for p, H in zip(paths, Hs):
+                    write_q.put((p, pool_embeddings(H, cfg)))
+    finally:
+        write_q.put(None)
+        writer.join()
+
+    return errors
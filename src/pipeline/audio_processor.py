@@ -1,8 +1,81 @@
 import os, json, torch
-from src.io.audio_loader import load_audio_16k
-from src.audio.wav2vec2_frames import extract_frames_chunked
-from src.audio.pooling import pool_windows
-from src.audio.normalize import zscore
+from src.io.audio_loader import load_audio_16k, iter_audio_16k
+from src.audio.wav2vec2_frames import extract_frames_chunked, iter_frames_chunked
+from src.audio.pooling import pool_windows, iter_pool_windows
+from src.audio.normalize import zscore, zscore_inplace
+from src.utils.growing_array import GrowingArray
+from src.io.manifest import record_output
+from src.io.embedding_names import embedding_name
+
+
+def embedding_paths(audio_path, out_dir, cfg):
+    base = os.path.splitext(os.path.basename(audio_path))[0]
+    emb_path = os.path.join(
+        out_dir,
+        embedding_name(base, cfg["windowing"]["win_sec"], cfg["model"]["layers"])
+    )
+    meta_path = emb_path.replace(".pt", "_meta.json")
+    return base, emb_path, meta_path
+
+
+def store_key(audio_path, cfg):
+    # packed-store key: the embedding file name without extension
+    _, emb_path, _ = embedding_paths(audio_path, "", cfg)
+    return os.path.splitext(emb_path)[0]
+
+
+def is_done(audio_path, out_dir, cfg, store=None):
+    if store is not None:
+        return store_key(audio_path, cfg) in store
+    _, emb_path, meta_path = embedding_paths(audio_path, out_dir, cfg)
+    return os.path.exists(emb_path) and os.path.exists(meta_path)
+
+
+def pool_embeddings(H, cfg):
+    W = pool_windows(
+        H,
+        cfg["model"]["frame_hz"],
+        cfg["windowing"]["win_sec"],
+        cfg["windowing"]["hop_sec"]
+    )
+
+    if cfg["normalization"]["zscore"] and W.numel() > 0:
+        W = zscore(W)
+
+    return W
+
+
+def save_embeddings(audio_path, W, out_dir, cfg, store=None):
+    """
+    Writes `W` and its metadata as .pt + _meta.json (recorded in the
+    output manifest when enabled), or as one entry of a packed store when
+    `store` is given.
+    """
+    base, emb_path, meta_path = embedding_paths(audio_path, out_dir, cfg)
+    meta = {
+        "audio": audio_path,
+        "model": cfg["model"]["name"],
+        "layers": cfg["model"]["layers"],
+        "secs_per_window": cfg["windowing"]["win_sec"],
+        "hop_sec": cfg["windowing"]["hop_sec"],
+        "n_windows": int(W.size(0)),
+        "dims": int(W.size(1)),
+    }
+
+    if store is not None:
+        store.put(store_key(audio_path, cfg), W, meta)
+    else:
+        torch.save(W.float(), emb_path)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        if cfg["manifest"]["enabled"]:
+            record_output(
+                out_dir, "audio", store_key(audio_path, cfg), emb_path,
+                W.shape, meta=meta
+            )
+
+    print(f"Saved {base}: {tuple(W.shape)}")
+
 
 def process_audio(
     audio_path,
@@ -10,14 +83,11 @@ def process_audio(
     processor,
     model,
     cfg,
-    device
+    device,
+    store=None
 ):
-    base = os.path.splitext(os.path.basename(audio_path))[0]
-    emb_path = os.path.join(out_dir, f"{base}_w2v2_{int(cfg['windowing']['win_sec'])}s.pt")
-    meta_path = emb_path.replace(".pt", "_meta.json")
-
-    if os.path.exists(emb_path) and os.path.exists(meta_path):
-        print(f"⏩ Skip {base}")
+    if is_done(audio_path, out_dir, cfg, store):
+        print(f"⏩ Skip {embedding_paths(audio_path, out_dir, cfg)[0]}")
         return
 
     wav = load_audio_16k(audio_path)
@@ -29,27 +99,61 @@ def process_audio(
         cfg["model"]["frame_hz"],
         cfg["chunking"]["chunk_sec"],
         cfg["chunking"]["overlap_sec"],
-        device
+        device,
+        layers=cfg["model"]["layers"]
     )
 
-    W = pool_windows(
-        H,
+    save_embeddings(audio_path, pool_embeddings(H, cfg), out_dir, cfg, store)
+
+
+def process_audio_streaming(
+    audio_path,
+    out_dir,
+    processor,
+    model,
+    cfg,
+    device,
+    store=None
+):
+    """
+    Bounded-memory variant of `process_audio` for long recordings: audio
+    is read block by block, pooled windows are emitted as soon as their
+    frames exist and appended to a growing memory-mapped array.
+    """
+    if is_done(audio_path, out_dir, cfg, store):
+        print(f"⏩ Skip {embedding_paths(audio_path, out_dir, cfg)[0]}")
+        return
+
+    _, emb_path, _ = embedding_paths(audio_path, out_dir, cfg)
+
+    frames = iter_frames_chunked(
+        iter_audio_16k(audio_path, cfg["streaming"]["block_sec"]),
+        processor,
+        model,
+        cfg["model"]["frame_hz"],
+        cfg["chunking"]["chunk_sec"],
+        cfg["chunking"]["overlap_sec"],
+        device,
+        layers=cfg["model"]["layers"]
+    )
+    windows = iter_pool_windows(
+        frames,
         cfg["model"]["frame_hz"],
         cfg["windowing"]["win_sec"],
         cfg["windowing"]["hop_sec"]
     )
 
-    if cfg["normalization"]["zscore"] and W.numel() > 0:
-        W = zscore(W)
-
-    torch.save(W.float(), emb_path)
+    # pooled windows live in a memory-mapped file: normalized in place and
+    # saved straight from the map, never copied into RAM as a whole
+    pooled = GrowingArray(emb_path + ".windows.f32", model.config.hidden_size)
+    try:
+        for block in windows:
+            pooled.append(block.numpy())
 
-    with open(meta_path, "w") as f:
-        json.dump({
-            "audio": audio_path,
-            "model": cfg["model"]["name"],
-            "n_windows": int(W.size(0)),
-            "dims": int(W.size(1)),
-        }, f, indent=2)
+        W = pooled.view(mode="r+")
+        if cfg["normalization"]["zscore"]:
+            zscore_inplace(W)
 
-    print(f"Saved {base}: {tuple(W.shape)}")
\ No newline at end of file
+        save_embeddings(audio_path, torch.from_numpy(W), out_dir, cfg, store)
+    finally:
+        pooled.close(remove=True)
@@ -0,0 +1,262 @@
+import os
+import time
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import nibabel as nib
+from tqdm import tqdm
+
+from src.pipeline.segment_processor import list_runs, process_run, finalize_segment
+from src.fmri.basis import fit_basis, save_basis
+from src.io.packed_store import entry_key
+
+
+def plan_jobs(
+    subject: str,
+    seg_dirs,
+    output_root: str,
+    use_mni: bool,
+    voxel_index=None,
+    basis_dir: str = None,
+    store=None
+):
+    """
+    Expands segments into (subject, segment, run) jobs. Segments whose
+    averaged embedding already exists (as a file or in `store`) are
+    returned as skipped.
+    """
+    jobs, skipped = [], []
+
+    for seg_dir in seg_dirs:
+        seg_name = os.path.basename(seg_dir)
+        out_dir = os.path.join(output_root, subject, seg_name)
+
+        if os.path.exists(os.path.join(out_dir, f"{seg_name}_avg_embeddings.pt")) \
+                or (store is not None and entry_key(subject, seg_name) in store):
+            skipped.append(_record(subject, seg_name, None, "skipped"))
+            continue
+
+        for nii_path in list_runs(seg_dir, use_mni):
+            jobs.append({
+                "subject": subject,
+                "segment": seg_name,
+                "run": os.path.basename(nii_path),
+                "nii_path": nii_path,
+                "out_dir": out_dir,
+                "voxel_index": voxel_index,
+                "basis_dir": basis_dir,
+            })
+
+    return jobs, skipped
+
+
+# float32 (TR, voxels) copies each decomposition backend materializes:
+# ipca works on TR blocks, gram on the full matrix, randomized also on a
+# centered copy of it
+DENSE_COPIES = {"ipca": 0, "gram": 1, "randomized": 2}
+
+
+def estimate_run_bytes(nii_path: str, n_voxels: int = None,
+                       streaming: bool = False, method: str = "ipca") -> int:
+    """
+    Peak bytes of embedding one run: the float64 volume from get_fdata plus
+    the reshape / normalization copies when loaded in memory, and the dense
+    copies `method` makes in either case.
+    """
+    shape = nib.load(nii_path).shape
+    n_voxels = n_voxels or int(np.prod(shape[:-1]))
+    n = int(shape[-1]) * n_voxels
+    dense = n * 4 * DENSE_COPIES.get(method, 1)
+    if streaming:
+        return dense
+    return n * 8 * 3 + dense
+
+
+def _record(subject, segment, run, status, **extra):
+    return {
+        "subject": subject,
+        "segment": segment,
+        "run": run,
+        "status": status,
+        "n_tr": extra.get("n_tr"),
+        "explained_var": extra.get("explained_var"),
+        "seconds": extra.get("seconds"),
+        "streaming": extra.get("streaming"),
+        "error": extra.get("error"),
+    }
+
+
+def _init_worker(threads_per_worker: int):
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads_per_worker)
+
+
+def _run_job(job: dict, run_kwargs: dict, memory_budget_bytes: int):
+    t0 = time.perf_counter()
+    kwargs = dict(run_kwargs)
+
+    try:
+        os.makedirs(job["out_dir"], exist_ok=True)
+        out_path = os.path.join(job["out_dir"], f"{job['run']}_embeddings.pt")
+
+        # Fall back to the streaming loader when the in-memory path would
+        # exceed the per-worker budget; backends that need the full matrix
+        # anyway fail the run instead of silently exceeding it
+        if memory_budget_bytes:
+            n_vox = None if job["voxel_index"] is None else len(job["voxel_index"])
+            method = "ipca" if job.get("basis_dir") \
+                else (kwargs.get("decomposition") or {}).get("method", "ipca")
+
+            if not kwargs.get("streaming") and \
+                    estimate_run_bytes(job["nii_path"], n_vox, False, method) > memory_budget_bytes:
+                kwargs["streaming"] = True
+
+            if kwargs.get("streaming"):
+                need = estimate_run_bytes(job["nii_path"], n_vox, True, method)
+                if need > memory_budget_bytes:
+                    raise MemoryError(
+                        f"decomposition '{method}' needs {need / 2**20:.1f} MB for the "
+                        f"full (TR, voxels) matrix, over memory_budget_mb; "
+                        f"use method ipca or raise the budget"
+                    )
+
+        T, ev = process_run(
+            job["nii_path"],
+            out_path,
+            voxel_index=job["voxel_index"],
+            basis_dir=job.get("basis_dir"),
+            **kwargs
+        )
+        return _record(
+            job["subject"], job["segment"], job["run"], "done",
+            n_tr=T, explained_var=ev, streaming=bool(kwargs.get("streaming")),
+            seconds=time.perf_counter() - t0
+        )
+    except Exception as e:
+        return _record(
+            job["subject"], job["segment"], job["run"], "failed",
+            error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}",
+            seconds=time.perf_counter() - t0
+        )
+
+
+def _fit_basis_job(spec: dict, fit_kwargs: dict):
+    t0 = time.perf_counter()
+    try:
+        basis = fit_basis(spec["nii_paths"], voxel_index=spec["voxel_index"], **fit_kwargs)
+        basis["meta"]["key"] = spec.get("key")
+        save_basis(spec["basis_dir"], basis)
+        return _record(
+            spec["name"], None, "pca_basis", "done",
+            explained_var=float(np.sum(basis["explained_variance_ratio"])),
+            seconds=time.perf_counter() - t0
+        )
+    except Exception as e:
+        return _record(
+            spec["name"], None, "pca_basis", "failed",
+            error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}",
+            seconds=time.perf_counter() - t0
+        )
+
+
+def fit_bases(specs, fit_kwargs: dict, num_workers: int = 1, threads_per_worker: int = 1):
+    """
+    Fits shared PCA bases (one per subject or one per group) over their
+    training runs, in parallel when num_workers > 1.
+    """
+    if num_workers <= 1 or len(specs) <= 1:
+        return [_fit_basis_job(spec, fit_kwargs) for spec in specs]
+
+    with ProcessPoolExecutor(
+        max_workers=min(num_workers, len(specs)),
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads_per_worker,)
+    ) as ex:
+        futures = [ex.submit(_fit_basis_job, spec, fit_kwargs) for spec in specs]
+        records = []
+        for spec, fut in zip(specs, futures):
+            try:
+                records.append(fut.result())
+            except Exception as e:
+                records.append(_record(
+                    spec["name"], None, "pca_basis", "failed",
+                    error=f"{type(e).__name__}: {e}"
+                ))
+        return records
+
+
+def run_jobs(
+    jobs,
+    run_kwargs: dict,
+    merge: bool,
+    num_workers: int = 1,
+    memory_budget_mb: float = None,
+    threads_per_worker: int = 1,
+    store=None,
+    manifest_root: str = None
+):
+    """
+    Runs (subject, segment, run) jobs across a process pool and merges each
+    segment as soon as all of its runs have finished successfully, into
+    `store` if given. Merged files are recorded in the manifest at
+    `manifest_root`. Returns one record per job.
+    """
+    budget = int(memory_budget_mb * 2**20) if memory_budget_mb else None
+
+    remaining, seg_paths, seg_failed = {}, {}, set()
+    for job in jobs:
+        key = (job["subject"], job["segment"])
+        remaining[key] = remaining.get(key, 0) + 1
+        seg_paths.setdefault(key, [])
+
+    records = []
+
+    def on_done(job, rec):
+        key = (job["subject"], job["segment"])
+        records.append(rec)
+        remaining[key] -= 1
+
+        if rec["status"] == "done":
+            seg_paths[key].append(
+                os.path.join(job["out_dir"], f"{job['run']}_embeddings.pt")
+            )
+        else:
+            seg_failed.add(key)
+            tqdm.write(f"   ❌ {key[0]}/{key[1]}/{job['run']}: {rec['error'].splitlines()[0]}")
+
+        if remaining[key] == 0 and key not in seg_failed:
+            finalize_segment(
+                sorted(seg_paths[key]), job["out_dir"], key[1], merge,
+                store, key[0], manifest_root
+            )
+
+    if num_workers <= 1:
+        for job in tqdm(jobs, desc="fMRI runs"):
+            on_done(job, _run_job(job, run_kwargs, budget))
+        return records
+
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(threads_per_worker,)
+    ) as ex:
+        futures = {ex.submit(_run_job, job, run_kwargs, budget): job for job in jobs}
+
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="fMRI runs"):
+            job = futures[fut]
+            try:
+                rec = fut.result()
+            except Exception as e:
+                # e.g. BrokenProcessPool after a worker was killed
+                rec = _record(
+                    job["subject"], job["segment"], job["run"], "failed",
+                    error=f"{type(e).__name__}: {e}"
+                )
+            on_done(job, rec)
+
+    return records
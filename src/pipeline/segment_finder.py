@@ -1,17 +1,62 @@
 import os
+import json
 from typing import List
 
+SEGMENT_PREFIXES = ("seg", "test")
 
-def find_seg_dirs(subject_dir: str) -> List[str]:
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load_cached(cache_path: str, subject_dir: str):
+    # cached list if none of the watched directories changed since
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path) as f:
+        cached = json.load(f)
+    if cached.get("subject_dir") != subject_dir:
+        return None
+    if any(_mtime(d) != m for d, m in cached["watched"].items()):
+        return None
+    return cached["seg_dirs"]
+
+
+def find_seg_dirs(subject_dir: str, cache_path: str = None) -> List[str]:
     """
     Recursively find all segment directories (seg*, test*)
     under a subject fMRI directory.
+
+    With `cache_path`, the result is stored there together with the mtimes
+    of the directories outside segment directories (where a new segment
+    directory would appear); later calls return it after a few stats
+    instead of walking the tree, until one of those directories changes.
     """
-    seg_dirs = []
+    if cache_path:
+        seg_dirs = _load_cached(cache_path, subject_dir)
+        if seg_dirs is not None:
+            return seg_dirs
+
+    seg_dirs, watched = [], {}
 
     for root, dirs, _ in os.walk(subject_dir):
+        rel = os.path.relpath(root, subject_dir)
+        if not any(p.startswith(SEGMENT_PREFIXES) for p in rel.split(os.sep)):
+            watched[root] = _mtime(root)
         for d in dirs:
-            if d.startswith(("seg", "test")):
+            if d.startswith(SEGMENT_PREFIXES):
                 seg_dirs.append(os.path.join(root, d))
 
-    return sorted(seg_dirs)
+    seg_dirs = sorted(seg_dirs)
+
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"subject_dir": subject_dir, "watched": watched, "seg_dirs": seg_dirs}, f)
+        os.replace(tmp_path, cache_path)
+
+    return seg_dirs
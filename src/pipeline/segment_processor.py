@@ -1,8 +1,95 @@
 import os
 import torch
-from src.io.nifti_loader import load_fmri_from_nifti
+from src.io.nifti_loader import load_fmri_from_nifti, NiftiBlockStream
+from src.io.nifti_cache import NiftiCache
 from src.fmri.pca_embedding import compute_embeddings
 from src.fmri.merge import merge_runs
+from src.fmri.basis import load_basis, project
+from src.io.packed_store import entry_key
+from src.io.manifest import record_output
+
+
+def list_runs(seg_dir: str, use_mni: bool):
+    data_dir = os.path.join(seg_dir, "mni" if use_mni else "raw")
+    return [
+        os.path.join(data_dir, f)
+        for f in os.listdir(data_dir) if f.endswith(".nii.gz")
+    ]
+
+
+def process_run(
+    nii_path: str,
+    out_path: str,
+    normalize_per_run: bool,
+    n_components: int,
+    batch_size: int,
+    streaming: bool = False,
+    chunk_trs: int = 64,
+    voxel_index=None,
+    decomposition: dict = None,
+    basis_dir: str = None,
+    cache: dict = None
+):
+    decomposition = dict(decomposition or {"method": "ipca"})
+    method = decomposition.pop("method")
+
+    if cache:
+        voxels, T = NiftiCache(**cache).load(
+            nii_path, normalize_per_run, voxel_index
+        )
+    elif streaming:
+        voxels = NiftiBlockStream(
+            nii_path, normalize_per_run, chunk_trs, voxel_index
+        )
+        T = voxels.n_tr
+    else:
+        voxels, T = load_fmri_from_nifti(
+            nii_path, normalize_per_run, voxel_index
+        )
+
+    if basis_dir:
+        Z, ev = project(voxels, load_basis(basis_dir), batch_size)
+    else:
+        Z, ev = compute_embeddings(
+            voxels,
+            n_components,
+            batch_size,
+            method,
+            **decomposition
+        )
+
+    torch.save(Z, out_path)
+    return T, ev
+
+
+def finalize_segment(
+    emb_paths,
+    out_dir: str,
+    seg_name: str,
+    merge: bool,
+    store=None,
+    subject_name: str = None,
+    manifest_root: str = None
+):
+    """
+    Averages the run embeddings of a segment into `{seg}_avg_embeddings.pt`
+    (recorded in the manifest at `manifest_root`, if given), or into the
+    packed `store` under (subject, segment) when one is given.
+    """
+    if merge and len(emb_paths) > 1:
+        avg = merge_runs(emb_paths)
+        meta = {"n_tr": int(avg.shape[0]), "n_runs": len(emb_paths)}
+        if store is not None:
+            store.put(entry_key(subject_name, seg_name), avg, meta)
+            return
+
+        avg_path = os.path.join(out_dir, f"{seg_name}_avg_embeddings.pt")
+        torch.save(avg, avg_path)
+        if manifest_root:
+            record_output(
+                manifest_root, "fmri", entry_key(subject_name, seg_name),
+                avg_path, avg.shape, meta=meta
+            )
 
 
 def process_segment(
@@ -13,38 +100,42 @@ def process_segment(
     normalize_per_run: bool,
     merge: bool,
     n_components: int,
-    batch_size: int
+    batch_size: int,
+    streaming: bool = False,
+    chunk_trs: int = 64,
+    voxel_index=None,
+    decomposition: dict = None,
+    basis_dir: str = None,
+    cache: dict = None,
+    store=None,
+    manifest_root: str = None
 ):
     seg_name = os.path.basename(seg_dir)
     out_dir = os.path.join(output_root, subject_name, seg_name)
     os.makedirs(out_dir, exist_ok=True)
 
-    data_dir = os.path.join(seg_dir, "mni" if use_mni else "raw")
-    nii_files = [f for f in os.listdir(data_dir) if f.endswith(".nii.gz")]
-
     emb_paths = []
 
-    for nii in nii_files:
-        voxels, T = load_fmri_from_nifti(
-            os.path.join(data_dir, nii),
-            normalize_per_run
-        )
+    for nii_path in list_runs(seg_dir, use_mni):
+        out_path = os.path.join(out_dir, f"{os.path.basename(nii_path)}_embeddings.pt")
 
-        Z, ev = compute_embeddings(
-            voxels,
+        T, ev = process_run(
+            nii_path,
+            out_path,
+            normalize_per_run,
             n_components,
-            batch_size
+            batch_size,
+            streaming,
+            chunk_trs,
+            voxel_index,
+            decomposition,
+            basis_dir,
+            cache
         )
-
-        out_path = os.path.join(out_dir, f"{nii}_embeddings.pt")
-        torch.save(Z, out_path)
         emb_paths.append(out_path)
 
         print(f"Saved {out_path} | TR={T} | EV={ev:.3f}")
 
-    if merge and len(emb_paths) > 1:
-        avg = merge_runs(emb_paths)
-        torch.save(
-            avg,
-            os.path.join(out_dir, f"{seg_name}_avg_embeddings.pt")
-        )
\ No newline at end of file
+    finalize_segment(
+        emb_paths, out_dir, seg_name, merge, store, subject_name, manifest_root
+    )
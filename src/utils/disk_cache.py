@@ -0,0 +1,92 @@
+import os
+import glob
+import hashlib
+import numpy as np
+
+
+def file_sha256(path: str, memo_dir: str = None, chunk_bytes: int = 1 << 20) -> str:
+    """
+    Content hash of a file. When `memo_dir` is given, the digest is memoized
+    under (realpath, size, mtime) so unchanged files are hashed only once.
+    """
+    st = os.stat(path)
+    memo_path = None
+
+    if memo_dir:
+        stamp = f"{os.path.realpath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        memo_path = os.path.join(memo_dir, hashlib.sha1(stamp.encode()).hexdigest())
+        if os.path.exists(memo_path):
+            with open(memo_path) as f:
+                return f.read().strip()
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_bytes), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    if memo_path:
+        os.makedirs(memo_dir, exist_ok=True)
+        tmp_path = f"{memo_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(digest)
+        os.replace(tmp_path, memo_path)
+
+    return digest
+
+
+def touch(path: str):
+    # entries are ranked for LRU eviction by mtime
+    os.utime(path, None)
+
+
+def evict_lru(cache_dir: str, max_bytes: int, pattern: str = "*", keep=()):
+    """
+    Deletes least-recently-used entries matching `pattern` until the total
+    size is at most `max_bytes`. Returns the number of evicted entries.
+    """
+    if not max_bytes:
+        return 0
+
+    keep = {os.path.abspath(p) for p in keep}
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, pattern)):
+        if ".tmp" in os.path.basename(path):
+            continue  # in-flight writes of other processes
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        evicted += 1
+
+    return evicted
+
+
+def open_npy_for_write(path: str, shape, dtype=np.float32):
+    """
+    Opens a temporary .npy memmap next to `path`; pass it to `commit_npy`
+    once filled so readers never see a partial entry.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    return np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=tuple(shape)), tmp_path
+
+
+def commit_npy(mm, tmp_path: str, path: str):
+    mm.flush()
+    del mm
+    os.replace(tmp_path, path)
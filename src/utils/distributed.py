@@ -0,0 +1,56 @@
+import os
+import torch
+import torch.distributed as dist
+
+
+def init_distributed(backend: str = "gloo"):
+    """
+    Joins the process group when launched by torchrun (WORLD_SIZE > 1 in
+    the environment) and returns (rank, world_size, device). Without
+    torchrun this is a no-op returning (0, 1, default device), so the same
+    entry point runs single-process.
+    """
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    local_rank = int(os.environ.get("LOCAL_RANK", 0))
+
+    if torch.cuda.is_available():
+        torch.cuda.set_device(local_rank)
+        device = f"cuda:{local_rank}"
+    else:
+        device = "cpu"
+
+    if world_size > 1 and not dist.is_initialized():
+        dist.init_process_group(backend)
+
+    return get_rank(), world_size, device
+
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+
+def is_main_process() -> bool:
+    return get_rank() == 0
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def all_reduce_sum(values, device="cpu"):
+    """Sums a list of floats over all ranks (identity when single-process)."""
+    if not is_distributed():
+        return list(values)
+    t = torch.tensor(values, dtype=torch.float64, device=device)
+    dist.all_reduce(t)
+    return t.tolist()
+
+
+def cleanup_distributed():
+    if is_distributed():
+        dist.destroy_process_group()
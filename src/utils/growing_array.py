@@ -0,0 +1,32 @@
+import os
+import numpy as np
+
+
+class GrowingArray:
+    """
+    Append-only (N, dims) array backed by a raw file on disk; `view()`
+    returns the rows written so far as a memory map.
+    """
+
+    def __init__(self, path: str, dims: int, dtype=np.float32):
+        self.path = path
+        self.dims = dims
+        self.dtype = np.dtype(dtype)
+        self.n = 0
+        self._f = open(path, "wb")
+
+    def append(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype).reshape(-1, self.dims)
+        self._f.write(rows.tobytes())
+        self.n += len(rows)
+
+    def view(self, mode: str = "r"):
+        self._f.flush()
+        if self.n == 0:
+            return np.zeros((0, self.dims), dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode=mode, shape=(self.n, self.dims))
+
+    def close(self, remove: bool = False):
+        self._f.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
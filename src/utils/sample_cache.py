@@ -0,0 +1,113 @@
+from collections import OrderedDict
+
+import torch
+from torch.utils.data import Dataset
+
+
+def _nbytes(sample) -> int:
+    return sum(x.numel() * x.element_size() for x in sample if isinstance(x, torch.Tensor))
+
+
+def _load(dataset, idx):
+    # float32 copies, detached from any file-backed (memmap) storage
+    return tuple(
+        x.to(torch.float32, copy=True) if isinstance(x, torch.Tensor) else x
+        for x in dataset[idx]
+    )
+
+
+class PackedSamples:
+    """
+    All samples of a dataset with one contiguous buffer per tensor field:
+    field i of every sample is concatenated along dim 0 and read back as a
+    view. Non-tensor fields (subject / segment names) are kept as lists.
+    """
+
+    def __init__(self, samples):
+        first = samples[0]
+        self.fields = []
+        for i, x in enumerate(first):
+            if isinstance(x, torch.Tensor):
+                parts = [s[i] for s in samples]
+                lengths = torch.tensor([len(p) for p in parts])
+                offsets = torch.cumsum(lengths, 0) - lengths
+                self.fields.append((torch.cat(parts), offsets, lengths))
+            else:
+                self.fields.append([s[i] for s in samples])
+
+    def map_buffers(self, fn):
+        self.fields = [
+            (fn(f[0]), f[1], f[2]) if isinstance(f, tuple) else f
+            for f in self.fields
+        ]
+
+    def __getitem__(self, idx):
+        out = []
+        for f in self.fields:
+            if isinstance(f, tuple):
+                buf, offsets, lengths = f
+                out.append(buf[offsets[idx]:offsets[idx] + lengths[idx]])
+            else:
+                out.append(f[idx])
+        return tuple(out)
+
+
+class CachedDataset(Dataset):
+    """
+    Opt-in in-memory cache over a map-style dataset whose items are tuples
+    of tensors (and strings). If everything fits in `max_mb`, all samples
+    are loaded, cast to float32 and packed once into contiguous buffers
+    (optionally pinned, or moved to shared memory so DataLoader workers do
+    not copy them), and epochs do no disk I/O. Otherwise samples are kept
+    in a least-recently-used cache capped at `max_mb` (one per worker).
+    """
+
+    def __init__(self, dataset, max_mb: float = None, pin_memory: bool = False,
+                 share_memory: bool = False):
+        self.dataset = dataset
+        self.max_bytes = int(max_mb * 2**20) if max_mb else None
+        self.packed = None
+        self.lru = OrderedDict()
+        self.lru_bytes = 0
+
+        samples, total = [], 0
+        for i in range(len(dataset)):
+            sample = _load(dataset, i)
+            total += _nbytes(sample)
+            if self.max_bytes is not None and total > self.max_bytes:
+                break
+            samples.append(sample)
+        else:
+            if samples:
+                self.packed = PackedSamples(samples)
+                if share_memory:
+                    self.packed.map_buffers(lambda b: b.share_memory_())
+                elif pin_memory and torch.cuda.is_available():
+                    self.packed.map_buffers(lambda b: b.pin_memory())
+            return
+
+        # over the cap: seed the LRU with what was loaded
+        for i, sample in enumerate(samples):
+            self._remember(i, sample)
+
+    def _remember(self, idx, sample):
+        self.lru[idx] = sample
+        self.lru_bytes += _nbytes(sample)
+        while self.lru_bytes > self.max_bytes and len(self.lru) > 1:
+            _, old = self.lru.popitem(last=False)
+            self.lru_bytes -= _nbytes(old)
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        if self.packed is not None:
+            return self.packed[idx]
+
+        if idx in self.lru:
+            self.lru.move_to_end(idx)
+            return self.lru[idx]
+
+        sample = _load(self.dataset, idx)
+        self._remember(idx, sample)
+        return sample
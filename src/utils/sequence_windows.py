@@ -0,0 +1,84 @@
+import torch
+from torch.nn.utils.rnn import pad_sequence
+from torch.utils.data import Dataset
+
+
+def _length(sample) -> int:
+    return next(x.shape[0] for x in sample if isinstance(x, torch.Tensor))
+
+
+def window_starts(n: int, seq_len: int, stride: int):
+    """
+    Starts of `seq_len` windows every `stride` steps over `n` steps, plus
+    one end-aligned window so the tail is covered. Sequences shorter than
+    `seq_len` give a single (short) window at 0.
+    """
+    last = max(n - seq_len, 0)
+    starts = list(range(0, last + 1, stride))
+    if starts[-1] != last:
+        starts.append(last)
+    return starts
+
+
+class SequenceWindows(Dataset):
+    """
+    Draws `seq_len` windows from every sample of a dataset of full-length,
+    time-aligned sequences (tuples of (T, D) tensors and strings), e.g. a
+    `CachedDataset`. mode="strided" enumerates windows every `stride`
+    steps; mode="random" draws `per_segment` windows with a fresh random
+    start on every access. All tensor fields are sliced alike.
+    """
+
+    def __init__(self, dataset, seq_len: int, mode: str = "strided",
+                 stride: int = None, per_segment: int = 1):
+        if mode not in ("strided", "random"):
+            raise ValueError(f"Unknown window mode '{mode}'. Available: ['strided', 'random']")
+
+        self.dataset = dataset
+        self.seq_len = seq_len
+        self.mode = mode
+        self.lengths = [_length(dataset[i]) for i in range(len(dataset))]
+
+        if mode == "strided":
+            self.index = [
+                (i, s)
+                for i, n in enumerate(self.lengths) if n > 0
+                for s in window_starts(n, seq_len, stride or seq_len)
+            ]
+        else:
+            self.index = [
+                (i, None)
+                for i, n in enumerate(self.lengths) if n > 0
+                for _ in range(per_segment)
+            ]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, idx):
+        i, s = self.index[idx]
+        if s is None:
+            s = int(torch.randint(0, max(self.lengths[i] - self.seq_len, 0) + 1, ()))
+        return tuple(
+            x[s:s + self.seq_len] if isinstance(x, torch.Tensor) else x
+            for x in self.dataset[i]
+        )
+
+
+def pad_collate(batch):
+    """
+    Collates samples of variable-length (T_i, D) tensors by zero-padding
+    every tensor field to the longest T in the batch. Returns the batched
+    fields followed by a (B, T) bool padding mask (True = padded), as
+    expected by `src_key_padding_mask` / `key_padding_mask`.
+    """
+    lengths = torch.tensor([_length(sample) for sample in batch])
+    mask = torch.arange(int(lengths.max())).unsqueeze(0) >= lengths.unsqueeze(1)
+
+    fields = []
+    for values in zip(*batch):
+        if isinstance(values[0], torch.Tensor):
+            fields.append(pad_sequence(list(values), batch_first=True))
+        else:
+            fields.append(list(values))
+    return (*fields, mask)
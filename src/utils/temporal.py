@@ -0,0 +1,104 @@
+import numpy as np
+import torch
+
+
+def window_bounds(n: int, win: int, hop: int):
+    """
+    (start, end) frame indices of sliding windows over `n` frames, with the
+    last window truncated at the end and no windows starting past it.
+    """
+    starts = torch.arange(0, n, hop)
+    covered = (starts + win >= n).nonzero()
+    if len(covered):
+        starts = starts[: int(covered[0]) + 1]
+    ends = torch.clamp(starts + win, max=n)
+    return starts, ends
+
+
+def interval_means(X: torch.Tensor, starts, ends):
+    """
+    Mean of X[s:e] along dim 0 for every (s, e) pair. Equally spaced,
+    equal-length windows are reduced through a strided `unfold` view (with
+    a short tail of truncated windows); arbitrary intervals go through a
+    sparse averaging matrix.
+    """
+    starts = torch.as_tensor(starts, dtype=torch.long)
+    ends = torch.as_tensor(ends, dtype=torch.long)
+    n, D = len(starts), X.shape[1]
+    out = torch.zeros(n, D, dtype=X.dtype)
+    if n == 0:
+        return out
+
+    lengths = ends - starts
+    L = int(lengths[0])
+    hop = int(starts[1] - starts[0]) if n > 1 else max(L, 1)
+    m = int((lengths == L).sum())
+    uniform = (
+        L > 0 and hop > 0
+        and torch.equal(starts, starts[0] + hop * torch.arange(n))
+        and bool((lengths[:m] == L).all())
+    )
+
+    if uniform:
+        s0 = int(starts[0])
+        out[:m] = X[s0:s0 + hop * (m - 1) + L].unfold(0, L, hop).mean(dim=-1)
+        for i in range(m, n):
+            if lengths[i] > 0:
+                out[i] = X[starts[i]:ends[i]].mean(dim=0)
+        return out
+
+    valid = lengths > 0
+    rows = torch.repeat_interleave(torch.arange(n)[valid], lengths[valid])
+    offsets = torch.cumsum(lengths[valid], 0) - lengths[valid]
+    cols = (
+        torch.repeat_interleave(starts[valid] - offsets, lengths[valid])
+        + torch.arange(len(rows))
+    )
+    vals = (1.0 / lengths.clamp(min=1).to(X.dtype))[rows]
+
+    A = torch.sparse_coo_tensor(
+        torch.stack([rows, cols]), vals, (n, X.shape[0]), check_invariants=False
+    )
+    return torch.sparse.mm(A, X)
+
+
+def overlap_weights(src_starts, src_ends, dst_starts, dst_ends):
+    """
+    (n_dst, n_src) row-normalized weights proportional to the temporal
+    overlap of each destination interval with each source interval.
+    Destination rows without any overlap are all zero.
+    """
+    src_s = torch.as_tensor(src_starts, dtype=torch.float64)
+    src_e = torch.as_tensor(src_ends, dtype=torch.float64)
+    dst_s = torch.as_tensor(dst_starts, dtype=torch.float64)
+    dst_e = torch.as_tensor(dst_ends, dtype=torch.float64)
+
+    overlap = (
+        torch.minimum(dst_e[:, None], src_e[None, :])
+        - torch.maximum(dst_s[:, None], src_s[None, :])
+    ).clamp(min=0)
+    total = overlap.sum(dim=1, keepdim=True)
+    return torch.where(total > 0, overlap / total.clamp(min=1e-12), overlap)
+
+
+def resample_overlap(X, src_hop: float, src_win: float, n_out: int, out_step: float):
+    """
+    Resamples a sequence of windows (start k*src_hop, length src_win) onto
+    `n_out` contiguous bins of `out_step` seconds by overlap-weighted
+    averaging.
+    """
+    n = X.shape[0]
+    src_starts = torch.arange(n, dtype=torch.float64) * src_hop
+    dst_starts = torch.arange(n_out, dtype=torch.float64) * out_step
+
+    A = overlap_weights(
+        src_starts, src_starts + src_win, dst_starts, dst_starts + out_step
+    )
+    return (A @ X.to(torch.float64)).to(X.dtype)
+
+
+def nearest_center(X, src_hop: float, src_win: float, n_out: int, out_step: float):
+    centers = (torch.arange(X.shape[0]) * src_hop + src_win / 2).numpy()
+    out_centers = np.arange(n_out) * out_step + out_step / 2
+    idx = np.clip(np.searchsorted(centers, out_centers), 0, X.shape[0] - 1)
+    return X[idx]
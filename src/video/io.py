@@ -1,16 +1,80 @@
-import imageio
+import logging
+import numpy as np
 import torch
-from PIL import Image
-from torchvision import transforms
+import imageio_ffmpeg
 
-def read_video_frames(path, transform, max_frames=None):
-    reader = imageio.get_reader(path, "ffmpeg")
-    frames = []
+# scaled reads are intended; silence the per-read "frame size differs" warning
+logging.getLogger("imageio_ffmpeg").setLevel(logging.ERROR)
 
-    for i, frame in enumerate(reader):
-        if max_frames and i >= max_frames:
-            break
-        frames.append(transform(Image.fromarray(frame)))
 
-    reader.close()
-    return torch.stack(frames)
+def _ffmpeg_params(size=None, start=0, fps=None, max_frames=None, interp="area"):
+    input_params, output_params = [], []
+    if start:
+        # input seek lands on frame `start` of a constant-frame-rate video
+        input_params += ["-ss", f"{(start - 0.5) / fps:.6f}"]
+    if size is not None:
+        output_params += ["-vf", f"scale={size[0]}:{size[1]}:flags={interp}"]
+    if max_frames is not None:
+        output_params += ["-frames:v", str(max_frames)]
+    return input_params, output_params
+
+
+def probe_video(path) -> dict:
+    """fps, duration, native (width, height) and estimated frame count."""
+    gen = imageio_ffmpeg.read_frames(path)
+    meta = next(gen)
+    gen.close()
+    return {
+        "fps": meta["fps"],
+        "duration": meta["duration"],
+        "size": tuple(meta["source_size"]),
+        "n_frames": int(round(meta["duration"] * meta["fps"])),
+    }
+
+
+def read_video(path, size=None, gray=False, start=0, max_frames=None,
+               dtype=np.uint8, interp="area"):
+    """
+    Decodes a video with ffmpeg doing the scaling (`size` = (width, height))
+    and colour conversion (RGB or gray) in the decoder, into one
+    preallocated (T, H, W, 3) / (T, H, W) array. float32 output is scaled
+    to [0, 1]. `start` / `max_frames` select frames [start, start + max_frames).
+    """
+    fps = probe_video(path)["fps"] if start else None
+    input_params, output_params = _ffmpeg_params(size, start, fps, max_frames, interp)
+    gen = imageio_ffmpeg.read_frames(
+        path,
+        pix_fmt="gray" if gray else "rgb24",
+        bits_per_pixel=8 if gray else 24,
+        input_params=input_params,
+        output_params=output_params,
+    )
+
+    meta = next(gen)
+    w, h = meta["size"]
+    shape = (h, w) if gray else (h, w, 3)
+    capacity = max_frames if max_frames is not None else \
+        max(int(round(meta["duration"] * meta["fps"])) - start + 1, 1)
+
+    frames = np.empty((capacity, *shape), dtype=np.uint8)
+    n = 0
+    for buf in gen:
+        if n == frames.shape[0]:
+            # frame count underestimated by the container metadata
+            frames = np.concatenate([frames, np.empty_like(frames)])
+        frames[n] = np.frombuffer(buf, dtype=np.uint8).reshape(shape)
+        n += 1
+    gen.close()
+
+    frames = frames[:n]
+    if dtype == np.float32:
+        out = np.empty(frames.shape, dtype=np.float32)
+        np.divide(frames, np.float32(255), out=out)
+        frames = out
+    return frames
+
+
+def read_video_frames(path, size, max_frames=None):
+    """(T, 3, H, W) float32 tensor in [0, 1] at `size` = (width, height)."""
+    frames = read_video(path, size, max_frames=max_frames, dtype=np.float32)
+    return torch.from_numpy(frames).permute(0, 3, 1, 2)
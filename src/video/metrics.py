@@ -1,24 +1,89 @@
 import torch
-import numpy as np
-from skimage.metrics import structural_similarity as ssim
-from skimage.metrics import peak_signal_noise_ratio as psnr
+import torch.nn.functional as F
 
-def compute_metrics(gt, gen, lpips_fn, device):
-    T = min(len(gt), len(gen))
-    gt, gen = gt[:T], gen[:T]
+# skimage structural_similarity defaults (uniform 7x7 window, sample covariance)
+SSIM_WIN = 7
+SSIM_K1, SSIM_K2 = 0.01, 0.03
+
+
+def psnr_frames(gt, gen, data_range=1.0):
+    """Per-frame PSNR of (T, C, H, W) clips -> (T,), as skimage peak_signal_noise_ratio."""
+    # squared error in the input precision, accumulated in float64
+    mse = (gt - gen).pow_(2).flatten(1).sum(dim=1, dtype=torch.float64) / gt[0].numel()
+    return 10 * torch.log10(data_range ** 2 / mse)
+
+
+def _box_mean(x, k):
+    # k x k "valid" moving average of every channel: one depthwise convolution
+    C = x.shape[1]
+    weight = torch.full((C, 1, k, k), 1.0 / (k * k), dtype=x.dtype, device=x.device)
+    return F.conv2d(x, weight, groups=C)
+
+
+def _ssim_chunk(x, y, data_range):
+    C = x.shape[1]
+    cov_norm = SSIM_WIN ** 2 / (SSIM_WIN ** 2 - 1)
+    c1 = (SSIM_K1 * data_range) ** 2
+    c2 = (SSIM_K2 * data_range) ** 2
 
-    gt_np  = gt.permute(0,2,3,1).cpu().numpy()
-    gen_np = gen.permute(0,2,3,1).cpu().numpy()
+    # x, y, x^2 + y^2, xy stacked on channels -> local means in one conv
+    stats = torch.empty((len(x), 4 * C, *x.shape[2:]), dtype=x.dtype, device=x.device)
+    stats[:, :C] = x
+    stats[:, C:2 * C] = y
+    torch.mul(x, x, out=stats[:, 2 * C:3 * C]).addcmul_(y, y)
+    torch.mul(x, y, out=stats[:, 3 * C:])
+    ux, uy, uxx_yy, uxy = _box_mean(stats, SSIM_WIN).split(C, dim=1)
 
-    ssim_vals, psnr_vals, lpips_vals = [], [], []
+    # S = (2 ux uy + c1)(2 vxy + c2) / ((ux^2 + uy^2 + c1)(vx + vy + c2))
+    uxuy = ux * uy
+    uu = (ux * ux).addcmul_(uy, uy)
+    num = (2 * uxuy + c1).mul_((uxy - uxuy).mul_(2 * cov_norm).add_(c2))
+    den = (uu + c1).mul_((uxx_yy - uu).mul_(cov_norm).add_(c2))
+    return num.div_(den).double().mean(dim=(2, 3)).mean(dim=1)
+
+
+def ssim_frames(gt, gen, data_range=1.0, chunk_frames=8):
+    """
+    Per-frame SSIM of (T, C, H, W) clips -> (T,), matching skimage
+    structural_similarity(channel_axis=-1) with its defaults: 7x7 uniform
+    window, sample covariance, mean over the window-border-cropped map of
+    each channel, then over channels. Local statistics come from one
+    depthwise box convolution per chunk of `chunk_frames` frames (small
+    chunks keep the intermediates cache-resident); its "valid" region is
+    exactly skimage's crop. Like skimage, float32 input is processed in
+    float32.
+    """
+    x, y = gt.float(), gen.float()
+    return torch.cat([
+        _ssim_chunk(x[i:i + chunk_frames], y[i:i + chunk_frames], data_range)
+        for i in range(0, len(x), chunk_frames)
+    ])
+
+
+def lpips_frames(gt, gen, lpips_fn, device, batch_size=32):
+    """Per-frame LPIPS -> (T,), evaluated on frame batches of `batch_size`."""
+    vals = []
+    with torch.no_grad():
+        for i in range(0, len(gt), batch_size):
+            d = lpips_fn(gt[i:i + batch_size].to(device), gen[i:i + batch_size].to(device))
+            vals.append(d.flatten().cpu())
+    return torch.cat(vals)
+
+
+def compute_frame_metrics(gt, gen, lpips_fn, device, batch_size=32):
+    """Per-frame SSIM / PSNR / LPIPS (each (T,)) over the common length."""
+    T = min(len(gt), len(gen))
+    gt, gen = gt[:T], gen[:T]
 
-    for i in range(T):
-        ssim_vals.append(ssim(gt_np[i], gen_np[i], channel_axis=-1, data_range=1.0))
-        psnr_vals.append(psnr(gt_np[i], gen_np[i], data_range=1.0))
+    # SSIM / PSNR on the whole clip at once, on `device`
+    x, y = gt.to(device), gen.to(device)
+    return {
+        "SSIM": ssim_frames(x, y).cpu(),
+        "PSNR": psnr_frames(x, y).cpu(),
+        "LPIPS": lpips_frames(gt, gen, lpips_fn, device, batch_size),
+    }
 
-        with torch.no_grad():
-            lpips_vals.append(
-                lpips_fn(gt[i:i+1].to(device), gen[i:i+1].to(device)).mean().item()
-            )
 
-    return np.mean(ssim_vals), np.mean(psnr_vals), np.mean(lpips_vals)
+def compute_metrics(gt, gen, lpips_fn, device, batch_size=32):
+    m = compute_frame_metrics(gt, gen, lpips_fn, device, batch_size)
+    return m["SSIM"].mean().item(), m["PSNR"].mean().item(), m["LPIPS"].mean().item()
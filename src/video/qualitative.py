@@ -1,19 +1,25 @@
 import os
-import imageio
+import imageio_ffmpeg
 import pandas as pd
 import matplotlib.pyplot as plt
 from PIL import Image
 from IPython.display import display, clear_output, Image as IPyImage
 import ipywidgets as widgets
 
+from .io import read_video
 
-def sample_frames(video_path, n_samples):
-    reader = imageio.get_reader(video_path, "ffmpeg")
-    total = reader.count_frames()
+
+def sample_frames(video_path, n_samples, max_frames=None):
+    # exact frame count (like reader.count_frames), then one seek and a
+    # single-frame decode per sample: at most one frame in memory at a time
+    total = imageio_ffmpeg.count_frames_and_secs(video_path)[0]
+    if max_frames is not None:
+        total = min(total, max_frames)
     indices = [int(i * (total - 1) / (n_samples - 1)) for i in range(n_samples)]
-    frames = [Image.fromarray(reader.get_data(idx)) for idx in indices]
-    reader.close()
-    return frames
+    return [
+        Image.fromarray(read_video(video_path, start=idx, max_frames=1)[0])
+        for idx in indices
+    ]
 
 
 def create_timeline_figure(gt_frames, fmri_frames, fusion_frames,
@@ -2,10 +2,18 @@ import os
 import pandas as pd
 from tqdm import tqdm
 from .io import read_video_frames
-from .metrics import compute_metrics
-
-def evaluate(cfg, transform, lpips_fn, device):
-    records = []
+from .metrics import compute_frame_metrics
+
+def evaluate(cfg, lpips_fn, device):
+    """
+    Clip-level means (one row per subject / segment / mode) and per-frame
+    SSIM / PSNR / LPIPS (one row per frame) as two DataFrames.
+    """
+    records, frame_records = [], []
+    batch_size = cfg["metrics"]["lpips_batch_size"]
+    # frames are decoded by ffmpeg directly at the metric resolution
+    h, w = cfg["video"]["resize"]
+    max_frames = cfg["video"].get("max_frames")
 
     for subj in cfg["subjects"]:
         subj_dir = os.path.join(cfg["paths"]["gen_dir"], subj)
@@ -17,16 +25,25 @@ def evaluate(cfg, transform, lpips_fn, device):
             if not os.path.exists(gt_path):
                 continue
 
-            gt_frames = read_video_frames(gt_path, transform)
+            gt_frames = read_video_frames(gt_path, (w, h), max_frames)
 
             for mode in ["fmri_only", "fusion"]:
                 gen_path = os.path.join(subj_dir, f"{seg}_{mode.replace('_only','')}_recon.mp4")
                 if not os.path.exists(gen_path):
                     continue
 
-                gen_frames = read_video_frames(gen_path, transform)
-                s,p,l = compute_metrics(gt_frames, gen_frames, lpips_fn, device)
+                gen_frames = read_video_frames(gen_path, (w, h), max_frames)
+                m = compute_frame_metrics(gt_frames, gen_frames, lpips_fn, device, batch_size)
+                s, p, l = (m[k].mean().item() for k in ("SSIM", "PSNR", "LPIPS"))
 
                 records.append([subj, seg, mode, s, p, l])
-
-    return pd.DataFrame(records, columns=["subject","segment","mode","SSIM","PSNR","LPIPS"])
+                frame_records += [
+                    [subj, seg, mode, t, m["SSIM"][t].item(), m["PSNR"][t].item(), m["LPIPS"][t].item()]
+                    for t in range(len(m["SSIM"]))
+                ]
+
+    df = pd.DataFrame(records, columns=["subject","segment","mode","SSIM","PSNR","LPIPS"])
+    frames_df = pd.DataFrame(
+        frame_records, columns=["subject","segment","mode","frame","SSIM","PSNR","LPIPS"]
+    )
+    return df, frames_df